@@ -0,0 +1,52 @@
+import argparse
+import contextlib
+import io
+import os
+import time
+from typing import Any, Callable
+
+from plox.lox import Lox
+
+TEST_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "test")
+
+
+def read_sources() -> list[str]:
+    sources: list[str] = []
+    for directory, _, files in sorted(os.walk(TEST_DIR)):
+        for file in sorted(files):
+            if file.endswith(".lox"):
+                with open(os.path.join(directory, file)) as f:
+                    sources.append(f.read())
+
+    return sources
+
+
+def fastest(run: Callable[[Any], Any], runs: int, setup: Callable[[], Any] = lambda: None) -> tuple[float, Any]:
+    # the best time of several runs, and what the last one returned; each run is handed what
+    # setup returns, made outside the timing, and anything it prints is thrown away
+    best: float = float("inf")
+    result: Any = None
+    for _ in range(runs):
+        prepared: Any = setup()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start: float = time.perf_counter()
+            result = run(prepared)
+            best = min(best, time.perf_counter() - start)
+
+    return best, result
+
+
+def add_engine_arguments(arg_parser: argparse.ArgumentParser) -> None:
+    arg_parser.add_argument("--runs", type=int, default=3, help="runs per program; the fastest is reported")
+    arg_parser.add_argument("--engine", choices=Lox.engines.keys(), action="append", help="engines to time; all by default")
+
+
+def engines(args: argparse.Namespace) -> list[str]:
+    return args.engine or list(Lox.engines.keys())
+
+
+def time_program(engine: str, program: str, size: int, runs: int) -> float:
+    # a program's SIZE replaced by size, run on a fresh Lox each time
+    source: str = program.replace("SIZE", str(size))
+    best, _ = fastest(lambda lox: lox.run(source), runs, lambda: Lox(engine))
+    return best
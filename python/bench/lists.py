@@ -0,0 +1,52 @@
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from harness import add_engine_arguments, engines, time_program
+
+# both build a list of n numbers, sum it front to back and reverse it
+LINKED = """
+class Node {
+  init(value, next) {
+    this.value = value;
+    this.next = next;
+  }
+}
+
+var head = nil;
+for (var i = 0; i < SIZE; i = i + 1) head = Node(i, head);
+
+var sum = 0;
+for (var node = head; node != nil; node = node.next) sum = sum + node.value;
+
+var reversed = nil;
+for (var node = head; node != nil; node = node.next) reversed = Node(node.value, reversed);
+print sum;
+"""
+
+NATIVE = """
+var items = list();
+for (var i = 0; i < SIZE; i = i + 1) push(items, i);
+
+var sum = 0;
+var count = length(items);
+for (var i = 0; i < count; i = i + 1) sum = sum + get(items, i);
+
+var reversed = list();
+while (length(items) > 0) push(reversed, pop(items));
+print sum;
+"""
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="linked instances against the native list")
+    arg_parser.add_argument("--size", type=int, default=100_000, help="items in each list")
+    add_engine_arguments(arg_parser)
+    args = arg_parser.parse_args()
+
+    for engine in engines(args):
+        for name, program in (("linked", LINKED), ("native", NATIVE)):
+            best: float = time_program(engine, program, args.size, args.runs)
+            print(f"{engine} {name}: {best:.3f}s for {args.size} items")
@@ -0,0 +1,53 @@
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from harness import add_engine_arguments, engines, time_program
+
+# both store n entries keyed by number and then look every one of them up
+LINKED = """
+class Entry {
+  init(key, value, next) {
+    this.key = key;
+    this.value = value;
+    this.next = next;
+  }
+}
+
+var head = nil;
+for (var i = 0; i < SIZE; i = i + 1) head = Entry(i, i * 2, head);
+
+fun lookup(key) {
+  for (var entry = head; entry != nil; entry = entry.next) {
+    if (entry.key == key) return entry.value;
+  }
+  return nil;
+}
+
+var sum = 0;
+for (var i = 0; i < SIZE; i = i + 1) sum = sum + lookup(i);
+print sum;
+"""
+
+NATIVE = """
+var entries = map();
+for (var i = 0; i < SIZE; i = i + 1) set(entries, i, i * 2);
+
+var sum = 0;
+for (var i = 0; i < SIZE; i = i + 1) sum = sum + get(entries, i);
+print sum;
+"""
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="a linear scan of linked instances against the native map")
+    arg_parser.add_argument("--size", type=int, default=2_000, help="entries in each map")
+    add_engine_arguments(arg_parser)
+    args = arg_parser.parse_args()
+
+    for engine in engines(args):
+        for name, program in (("linked", LINKED), ("native", NATIVE)):
+            best: float = time_program(engine, program, args.size, args.runs)
+            print(f"{engine} {name}: {best:.3f}s for {args.size} entries")
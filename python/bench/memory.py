@@ -0,0 +1,102 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tracemalloc
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from harness import read_sources
+from plox.callable import LoxClass
+from plox.environment import Environment, GlobalEnvironment
+from plox.errors import LoxErrors
+from plox.parser import Parser
+from plox.scanner import Scanner, StreamScanner
+from plox.tokens import Token, TokenType
+
+
+def allocated(build: Callable[[], Any]) -> tuple[int, Any]:
+    # bytes still allocated once build returns, i.e. what its result keeps alive
+    tracemalloc.start()
+    before: int = tracemalloc.get_traced_memory()[0]
+    result: Any = build()
+    after: int = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def parse_all(sources: list[str]) -> list[Any]:
+    programs: list[Any] = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for source in sources:
+            tokens = StreamScanner(source).scan_tokens()
+            programs.append((tokens, Parser(tokens).parse()))
+            LoxErrors.had_error = False
+
+    return programs
+
+
+def generated_script(size: int) -> str:
+    lines: list[str] = ["var v0 = 0;"]
+    length: int = 0
+    i: int = 1
+    while length < size:
+        line: str = f"fun f{i}(a, b) {{ var v{i} = (a + {i}.5) * b; print \"f{i}\"; return v{i} <= a or !b; }}"
+        lines.append(line)
+        length += len(line) + 1
+        i += 1
+
+    return "\n".join(lines)
+
+
+def environments(count: int) -> list[Environment]:
+    # a chain of call frames holding three locals each, like a recursive function's
+    frames: list[Environment] = []
+    enclosing: Environment | GlobalEnvironment = GlobalEnvironment()
+    for i in range(count):
+        environment = Environment(enclosing)
+        environment.values.extend((float(i), None, True))
+        frames.append(environment)
+        enclosing = environment
+
+    return frames
+
+
+def instances(count: int) -> list[Any]:
+    klass = LoxClass("Point", None, {})
+    x = Token(TokenType.IDENTIFIER, "x", None, 1)
+    y = Token(TokenType.IDENTIFIER, "y", None, 1)
+
+    points: list[Any] = []
+    for i in range(count):
+        point = klass.call(None, [])
+        point.set(x, float(i))
+        point.set(y, float(i))
+        points.append(point)
+
+    return points
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="resident memory of parsed programs and runtime objects")
+    arg_parser.add_argument("--repeat", type=int, default=1, help="times each test program is parsed")
+    arg_parser.add_argument("--script-size", type=int, default=4, help="size of the generated script in MiB")
+    arg_parser.add_argument("--count", type=int, default=100_000, help="environments and instances allocated")
+    args = arg_parser.parse_args()
+
+    sources: list[str] = read_sources() * args.repeat
+    size, _ = allocated(lambda: parse_all(sources))
+    print(f"tokens and ASTs: {size / 2 ** 20:.2f} MiB for {len(sources)} programs")
+
+    script: str = generated_script(args.script_size * 2 ** 20)
+    for scanner in (Scanner, StreamScanner):
+        size, _ = allocated(lambda: scanner(script).scan_tokens())
+        print(f"{scanner.__name__} tokens: {size / 2 ** 20:.2f} MiB for a {args.script_size} MiB script")
+
+    size, _ = allocated(lambda: environments(args.count))
+    print(f"environments: {size / args.count:.1f} bytes each")
+
+    size, _ = allocated(lambda: instances(args.count))
+    print(f"instances: {size / args.count:.1f} bytes each")
@@ -0,0 +1,30 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from harness import fastest, read_sources
+from plox.errors import LoxErrors
+from plox.parser import Parser, PrattParser
+from plox.scanner import RegexStreamScanner
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="parser throughput in tokens per second")
+    arg_parser.add_argument("--repeat", type=int, default=10, help="times each test program is parsed per run")
+    arg_parser.add_argument("--runs", type=int, default=5, help="runs per parser; the fastest is reported")
+    args = arg_parser.parse_args()
+
+    # the test programs include the error tests, whose messages aren't wanted here
+    with contextlib.redirect_stdout(io.StringIO()):
+        streams = [RegexStreamScanner(source).scan_tokens() for source in read_sources()] * args.repeat
+    count: int = sum(len(tokens) for tokens in streams)
+
+    for parser in (Parser, PrattParser):
+        best, _ = fastest(lambda _: [parser(tokens).parse() for tokens in streams], args.runs)
+        LoxErrors.had_error = False
+
+        print(f"{parser.__name__}: {count / best / 1e6:.2f}M tokens/s ({best:.3f}s for {count} tokens)")
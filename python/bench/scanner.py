@@ -0,0 +1,25 @@
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from harness import fastest, read_sources
+from plox.scanner import RegexScanner, RegexStreamScanner, Scanner, StreamScanner
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="scanner throughput in tokens per second")
+    arg_parser.add_argument("--repeat", type=int, default=10, help="copies of the test/ corpus scanned at once")
+    arg_parser.add_argument("--runs", type=int, default=5, help="runs per scanner; the fastest is reported")
+    args = arg_parser.parse_args()
+
+    corpus: str = "\n".join(read_sources()) * args.repeat
+    print(f"corpus: {len(corpus) / 2 ** 20:.2f} MiB")
+
+    for scanner in (Scanner, StreamScanner, RegexScanner, RegexStreamScanner):
+        # the corpus holds the error tests too, whose messages fastest() throws away
+        best, tokens = fastest(lambda _: scanner(corpus).scan_tokens(), args.runs)
+        count: int = len(tokens)
+
+        print(f"{scanner.__name__}: {count / best / 1e6:.2f}M tokens/s ({best:.3f}s for {count} tokens)")
@@ -0,0 +1,28 @@
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from harness import add_engine_arguments, engines, time_program
+
+# builds a string from n pieces, one + at a time, and prints it
+PROGRAM = """
+var s = "";
+for (var i = 0; i < SIZE; i = i + 1) s = s + "piece ";
+print s;
+"""
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="time to build a string by repeated concatenation")
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[25_000, 50_000, 100_000],
+                            help="numbers of pieces to concatenate")
+    add_engine_arguments(arg_parser)
+    args = arg_parser.parse_args()
+
+    for engine in engines(args):
+        for size in args.sizes:
+            best: float = time_program(engine, PROGRAM, size, args.runs)
+            # linear scaling shows as a constant time per piece
+            print(f"{engine} {size} pieces: {best:.3f}s, {best / size * 1e6:.2f}us per piece")
@@ -1,15 +1,93 @@
+import argparse
 import sys
+from typing import Optional
 
-from plox import Lox, LoxErrors
+from plox import Lox, LoxErrors, Optimizer, ProgramCache
 
-if __name__ == "__main__":
-    lox = Lox()
 
-    if len(sys.argv) > 2:
-        print("Usage: lox.py [script]")
+class ArgumentParser(argparse.ArgumentParser):
+    def error(self, message: str):
+        self.print_usage(sys.stderr)
+        print(f"{self.prog}: error: {message}", file=sys.stderr)
         sys.exit(64)
-    elif len(sys.argv) == 2:
-        lox.run(open(sys.argv[1]).read())
+
+
+if __name__ == "__main__":
+    arg_parser = ArgumentParser(prog="lox.py")
+    arg_parser.add_argument("script", nargs="?")
+    arg_parser.add_argument("--engine", choices=Lox.engines.keys(), default="tree",
+                            help="execution engine used to run the resolved program")
+    arg_parser.add_argument("--optimize", action="store_true",
+                            help="run the AST optimizer between resolution and execution")
+    arg_parser.add_argument("--skip-pass", action="append", choices=Optimizer.passes.keys(), default=[],
+                            help="optimizer pass to leave out; may be repeated")
+    arg_parser.add_argument("--print-ast", action="store_true",
+                            help="print the resolved (and optimized) program instead of running it")
+    arg_parser.add_argument("--stats", action="store_true",
+                            help="print the execution engine's counters after running")
+    arg_parser.add_argument("--memoize", action="store_true",
+                            help="cache the results of pure functions (tree and closure engines)")
+    arg_parser.add_argument("--intern-strings", action="store_true",
+                            help="intern the results of string concatenation")
+    arg_parser.add_argument("--stream", action="store_true",
+                            help="run each top-level declaration as soon as it has been read")
+    arg_parser.add_argument("--lazy", action="store_true",
+                            help="parse function bodies when first called (tree engine)")
+    arg_parser.add_argument("--check", action="store_true",
+                            help="report syntax and resolution errors without running the script")
+    arg_parser.add_argument("--no-cache", action="store_true",
+                            help="neither read nor write the script's resolved program in __loxcache__")
+    arg_parser.add_argument("--max-frames", type=int,
+                            help="call depth at which the vm engine reports a stack overflow")
+    args = arg_parser.parse_args()
+
+    if args.max_frames is not None and (args.engine != "vm" or args.max_frames < 1):
+        arg_parser.error("--max-frames needs the vm engine and a positive depth")
+
+    if args.memoize and args.engine not in ("tree", "closure"):
+        arg_parser.error("--memoize needs the tree or closure engine")
+
+    if args.memoize and args.script is None:
+        arg_parser.error("--memoize needs a script")
+
+    if args.stream and (args.memoize or args.script is None):
+        arg_parser.error("--stream needs a script and can't be combined with --memoize")
+
+    if args.lazy and (args.engine != "tree" or args.optimize or args.print_ast or args.memoize or args.stream):
+        arg_parser.error("--lazy needs the tree engine and no --optimize, --print-ast, --memoize or --stream")
+
+    if args.lazy and args.script is None:
+        arg_parser.error("--lazy needs a script")
+
+    if args.check and args.script is None:
+        arg_parser.error("--check needs a script")
+
+    optimizer: Optional[Optimizer] = None
+    if args.optimize:
+        optimizer = Optimizer([name for name in Optimizer.passes.keys() if name not in args.skip_pass])
+
+    lox = Lox(args.engine, optimizer, args.print_ast, args.memoize, args.intern_strings, args.lazy)
+    if args.max_frames is not None:
+        lox.interpreter.max_frames = args.max_frames
+
+    if args.script is not None:
+        if args.check:
+            lox.check(open(args.script).read())
+        elif args.stream:
+            with open(args.script) as f:
+                lox.run_stream(f)
+        else:
+            cache: Optional[ProgramCache] = None if args.no_cache else ProgramCache(args.script, args.memoize)
+            lox.run(open(args.script).read(), cache)
+
+        if args.print_ast and optimizer is not None:
+            for name, removed in optimizer.removed.items():
+                print(f"{name}: removed {removed} nodes", file=sys.stderr)
+
+        if args.stats:
+            for name, value in lox.interpreter.stats().items():
+                print(f"{name}: {value}", file=sys.stderr)
+
         if LoxErrors.had_error:
             sys.exit(65)
 
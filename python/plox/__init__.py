@@ -1,2 +1,4 @@
 from .errors import LoxErrors
+from .cache import ProgramCache
 from .lox import Lox
+from .optimizer import Optimizer
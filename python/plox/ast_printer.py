@@ -1,29 +1,100 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Union
 
-from .visitor import ExprVisitor
+from .visitor import ExprVisitor, StmtVisitor
 
 if TYPE_CHECKING:
-    from .expr import Expr, Unary, Literal, Grouping, Binary
+    from .expr import Assign, Binary, Call, Expr, Get, Grouping, Literal, Logical, Set, Super, This, Unary, Variable
+    from .stmt import Stmt, Block, Class, Expression, Function, If, Print, Return, Var, While
 
 
-class AstPrinter(ExprVisitor):
-    def print(self, expr: Expr) -> str:
-        return expr.accept(self)
+class AstPrinter(ExprVisitor, StmtVisitor):
+    def print(self, node: Union[Expr, Stmt]) -> str:
+        return node.accept(self)
+
+    def print_program(self, statements: list[Stmt]) -> str:
+        return "\n".join(self.print(statement) for statement in statements)
+
+    def visit_assign_expr(self, expr: Assign) -> str:
+        return self._parenthesize(f"= {expr.name.lexeme}", expr.value)
 
     def visit_binary_expr(self, expr: Binary) -> str:
         return self._parenthesize(expr.operator.lexeme, expr.left, expr.right)
 
+    def visit_call_expr(self, expr: Call) -> str:
+        return self._parenthesize("call", expr.callee, *expr.arguments)
+
+    def visit_get_expr(self, expr: Get) -> str:
+        return self._parenthesize(f". {expr.name.lexeme}", expr.obj)
+
     def visit_grouping_expr(self, expr: Grouping) -> str:
         return self._parenthesize("group", expr.expression)
 
     def visit_literal_expr(self, expr: Literal) -> str:
         if expr.value is None:
             return "nil"
+        if type(expr.value) is bool:
+            return "true" if expr.value else "false"
         return str(expr.value)
 
+    def visit_logical_expr(self, expr: Logical) -> str:
+        return self._parenthesize(expr.operator.lexeme, expr.left, expr.right)
+
+    def visit_set_expr(self, expr: Set) -> str:
+        return self._parenthesize(f"=. {expr.name.lexeme}", expr.obj, expr.value)
+
+    def visit_super_expr(self, expr: Super) -> str:
+        return f"(super {expr.method.lexeme})"
+
+    def visit_this_expr(self, expr: This) -> str:
+        return "this"
+
     def visit_unary_expr(self, expr: Unary) -> str:
         return self._parenthesize(expr.operator.lexeme, expr.right)
 
-    def _parenthesize(self, name: str, *exprs: Expr) -> str:
-        return f"({name} {' '.join([e.accept(self) for e in exprs])})"
+    def visit_variable_expr(self, expr: Variable) -> str:
+        return expr.name.lexeme
+
+    def visit_block_stmt(self, stmt: Block) -> str:
+        return self._parenthesize("block", *stmt.statements)
+
+    def visit_class_stmt(self, stmt: Class) -> str:
+        name: str = f"class {stmt.name.lexeme}"
+        if stmt.superclass is not None:
+            name += f" < {stmt.superclass.name.lexeme}"
+        return self._parenthesize(name, *stmt.methods)
+
+    def visit_expression_stmt(self, stmt: Expression) -> str:
+        return self._parenthesize(";", stmt.expression)
+
+    def visit_function_stmt(self, stmt: Function) -> str:
+        params: str = " ".join(param.lexeme for param in stmt.params)
+        return self._parenthesize(f"fun {stmt.name.lexeme} ({params})", *stmt.body)
+
+    def visit_if_stmt(self, stmt: If) -> str:
+        if stmt.else_branch is None:
+            return self._parenthesize("if", stmt.condition, stmt.then_branch)
+        return self._parenthesize("if-else", stmt.condition, stmt.then_branch, stmt.else_branch)
+
+    def visit_print_stmt(self, stmt: Print) -> str:
+        return self._parenthesize("print", stmt.expression)
+
+    def visit_return_stmt(self, stmt: Return) -> str:
+        if stmt.value is None:
+            return "(return)"
+        return self._parenthesize("return", stmt.value)
+
+    def visit_var_stmt(self, stmt: Var) -> str:
+        if stmt.initializer is None:
+            return f"(var {stmt.name.lexeme})"
+        return self._parenthesize(f"var {stmt.name.lexeme}", stmt.initializer)
+
+    def visit_while_stmt(self, stmt: While) -> str:
+        if stmt.condition is None:
+            return self._parenthesize("loop", stmt.body)
+        return self._parenthesize("while", stmt.condition, stmt.body)
+
+    def _parenthesize(self, name: str, *nodes: Union[Expr, Stmt]) -> str:
+        if len(nodes) == 0:
+            return f"({name})"
+        return f"({name} {' '.join([node.accept(self) for node in nodes])})"
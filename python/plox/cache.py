@@ -0,0 +1,87 @@
+from __future__ import annotations
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+from typing import TYPE_CHECKING, Final, Optional
+
+if TYPE_CHECKING:
+    from .interpreter import Interpreter
+    from .stmt import Function, Stmt
+    from .vm import VM
+
+CACHE_DIRECTORY: Final = "__loxcache__"
+
+# part of every key; bump it whenever tokens, AST nodes or resolution change shape
+CACHE_VERSION: Final = 2
+
+
+class Resolution:
+    # What the resolver tells the interpreter rather than storing on the nodes, recorded so it
+    # can be stored along with the program it belongs to and handed to an interpreter later.
+
+    __slots__ = ("pure",)
+
+    def __init__(self):
+        self.pure: Final[list[Function]] = []
+
+    def mark_pure(self, function: Function) -> None:
+        self.pure.append(function)
+
+    def apply(self, interpreter: Interpreter | VM) -> None:
+        for function in self.pure:
+            interpreter.mark_pure(function)
+
+
+class ProgramCache:
+    # Keeps a script's resolved program in a .loxc file in a __loxcache__ directory next to it,
+    # like CPython's __pycache__, so running it again unchanged skips scanning, parsing and
+    # resolving. A file holds its key, then the pickled program and resolution; the key hashes
+    # the source along with everything else that decides what the front end produces. Any
+    # problem reading or writing the cache just means the front end runs.
+
+    def __init__(self, script: str, memoize: bool):
+        self._script: Final = script
+        directory, name = os.path.split(os.path.abspath(script))
+        self.path: Final = os.path.join(directory, CACHE_DIRECTORY, f"{name}.{sys.implementation.cache_tag}.loxc")
+        self._memoize: Final = memoize
+
+    def load(self, source: str) -> Optional[tuple[list[Stmt], Resolution]]:
+        try:
+            with open(self.path, "rb") as f:
+                if pickle.load(f) != self._key(source):
+                    return None
+
+                return pickle.load(f)
+        except Exception:
+            # missing, truncated or written by an incompatible version
+            return None
+
+    def store(self, source: str, statements: list[Stmt], resolution: Resolution) -> None:
+        directory: str = os.path.dirname(self.path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+
+            # written to a temporary file and renamed over the cache, so a reader only ever sees
+            # a complete file, even with several runs of the same script at once
+            fd, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    # readable by whoever can read the script, as __pycache__ files are
+                    os.chmod(temporary, os.stat(self._script).st_mode & 0o666)
+                    pickle.dump(self._key(source), f, pickle.HIGHEST_PROTOCOL)
+                    pickle.dump((statements, resolution), f, pickle.HIGHEST_PROTOCOL)
+
+                os.replace(temporary, self.path)
+            except BaseException:
+                os.unlink(temporary)
+                raise
+        except (OSError, RecursionError, pickle.PicklingError):
+            # an unwritable directory, or a program nested too deeply to pickle
+            pass
+
+    def _key(self, source: str) -> bytes:
+        digest = hashlib.sha256(f"{CACHE_VERSION} {self._memoize}\n".encode())
+        digest.update(source.encode())
+        return digest.digest()
@@ -1,8 +1,9 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Any, Final
+from typing import TYPE_CHECKING, Any, Final, Optional
 
 from .errors import LoxRuntimeError
+from .shape import Shape
 
 if TYPE_CHECKING:
     from .function import LoxFunction
@@ -11,6 +12,8 @@ if TYPE_CHECKING:
 
 
 class LoxCallable(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def arity(self) -> int:
         raise NotImplementedError
@@ -21,29 +24,29 @@ class LoxCallable(ABC):
 
 
 class LoxClass(LoxCallable):
+    __slots__ = ("name", "methods", "initializer", "_arity", "shape")
+
     def __init__(self, name: str, superclass: LoxClass, methods: dict[str, LoxFunction]):
         self.name: Final = name
-        self._superclass: Final = superclass
-        self._methods: Final = methods
 
-    def find_method(self, name: str) -> LoxFunction:
-        if name in self._methods.keys():
-            return self._methods[name]
+        # inherited methods are copied down once, so lookups never walk the superclass chain
+        self.methods: Final[dict[str, LoxFunction]] = {} if superclass is None else dict(superclass.methods)
+        self.methods.update(methods)
 
-        if self._superclass is not None:
-            return self._superclass.find_method(name)
+        self.initializer: Final[Optional[LoxFunction]] = self.methods.get("init")
+        self._arity: Final = 0 if self.initializer is None else self.initializer.arity()
+        self.shape: Final = Shape(self, {})
+
+    def find_method(self, name: str) -> Optional[LoxFunction]:
+        return self.methods.get(name)
 
     def arity(self) -> int:
-        initializer: LoxFunction = self.find_method("init")
-        if initializer is None:
-            return 0
-        return initializer.arity()
+        return self._arity
 
     def call(self, interpreter: Interpreter, arguments: list[Any]) -> Any:
         instance = LoxInstance(self)
-        initializer: LoxFunction = self.find_method("init")
-        if initializer is not None:
-            initializer.bind(instance).call(interpreter, arguments)
+        if self.initializer is not None:
+            self.initializer.invoke(interpreter, instance, arguments)
 
         return instance
 
@@ -52,22 +55,30 @@ class LoxClass(LoxCallable):
 
 
 class LoxInstance:
+    __slots__ = ("shape", "fields")
+
     def __init__(self, klass: LoxClass):
-        self._klass = klass
-        self._fields: Final[dict[str, Any]] = {}
+        self.shape: Shape = klass.shape
+        self.fields: Final[list[Any]] = []
 
     def get(self, name: Token) -> Any:
-        if name.lexeme in self._fields.keys():
-            return self._fields[name.lexeme]
+        slot: Optional[int] = self.shape.slots.get(name.lexeme)
+        if slot is not None:
+            return self.fields[slot]
 
-        method: LoxFunction = self._klass.find_method(name.lexeme)
+        method: LoxFunction = self.shape.klass.find_method(name.lexeme)
         if method is not None:
             return method.bind(self)
 
         raise LoxRuntimeError(name, f"Undefined property '{name.lexeme}'.")
 
     def set(self, name: Token, value: Any) -> None:
-        self._fields[name.lexeme] = value
+        slot: Optional[int] = self.shape.slots.get(name.lexeme)
+        if slot is not None:
+            self.fields[slot] = value
+        else:
+            self.shape = self.shape.with_field(name.lexeme)
+            self.fields.append(value)
 
     def __str__(self):
-        return f"{self._klass.name} instance"
+        return f"{self.shape.klass.name} instance"
@@ -0,0 +1,630 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Callable, Final, Optional
+
+from .callable import LoxCallable, LoxClass, LoxInstance
+from .environment import Environment, GlobalEnvironment
+from .errors import LoxErrors, LoxRuntimeError
+from .expr import Get
+from .interpreter import Interpreter
+from .natives import LoxNative
+from .rope import Rope, strings_equal
+from .tokens import TokenType
+
+if TYPE_CHECKING:
+    from .expr import Assign, Binary, Call, Expr, Grouping, Literal, Logical, Resolvable, Set, Super, This, Unary, Variable
+    from .memo import MemoCache
+    from .stmt import Stmt, Block, Class, Expression, Function, If, Print, Return, Var, While
+    from .tokens import Token
+
+# an expression thunk evaluates to a value; a statement thunk evaluates to None, or to a
+# one-element tuple holding the returned value once a return statement has executed
+Thunk = Callable[[Environment | GlobalEnvironment], Any]
+
+
+class CompiledFunction(LoxCallable):
+    __slots__ = ("_declaration", "param_count", "_body", "_closure", "_is_initializer", "_this", "_memo")
+
+    def __init__(self, declaration: Function, body: Thunk, closure: Environment | GlobalEnvironment,
+                 is_initializer: bool, this: Optional[LoxInstance] = None, memo: Optional[MemoCache] = None):
+        self._declaration: Final = declaration
+        self.param_count: Final = len(declaration.params)
+        self._body: Final = body
+        self._closure: Final = closure
+        self._is_initializer: Final = is_initializer
+        self._this: Final = this
+        self._memo: Final = memo
+
+    def bind(self, instance: LoxInstance) -> CompiledFunction:
+        return CompiledFunction(self._declaration, self._body, self._closure, self._is_initializer, instance)
+
+    def arity(self) -> int:
+        return self.param_count
+
+    def call(self, interpreter: Interpreter, arguments: list[Any]) -> Any:
+        if self._memo is not None:
+            return self._memo.call(self, interpreter, arguments)
+
+        return self.invoke(interpreter, self._this, arguments)
+
+    def invoke(self, interpreter: Interpreter, this: Optional[LoxInstance], arguments: list[Any]) -> Any:
+        environment = Environment(self._closure)
+        if this is not None:
+            environment.values.append(this)
+        environment.values.extend(arguments)
+
+        completion: Optional[tuple] = self._body(environment)
+
+        if self._is_initializer:
+            return this
+
+        if completion is not None:
+            return completion[0]
+
+    def __str__(self):
+        return f"<fn {self._declaration.name.lexeme}>"
+
+
+class ClosureInterpreter(Interpreter):
+    # Compiles each resolved statement into a tree of Python closures before running it, so the
+    # visitor dispatch, operator matching and scope distance lookups are paid once per node
+    # instead of once per evaluation. The visit methods therefore return thunks, not values.
+
+    def __init__(self, intern_strings: bool = False):
+        super().__init__(intern_strings)
+        self._scope_depth = 0
+
+    def interpret(self, statements: list[Stmt]) -> None:
+        program: list[Thunk] = [self._compile(statement) for statement in statements]
+
+        try:
+            for thunk in program:
+                thunk(self.globals)
+        except LoxRuntimeError as e:
+            LoxErrors.runtime_error(e)
+
+    def visit_assign_expr(self, expr: Assign) -> Thunk:
+        value: Thunk = self._compile(expr.value)
+        name: Token = expr.name
+        lexeme: str = name.lexeme
+
+        distance: Optional[int] = expr.depth
+        if distance is None:
+            values = self.globals.values
+
+            def assign_global(env: Environment) -> Any:
+                result = value(env)
+                if lexeme not in values:
+                    raise LoxRuntimeError(name, f"Undefined variable '{lexeme}'.")
+                values[lexeme] = result
+                return result
+
+            return assign_global
+
+        slot: int = expr.slot
+
+        if distance == 0:
+            def assign_local(env: Environment) -> Any:
+                result = env.values[slot] = value(env)
+                return result
+
+            return assign_local
+
+        if distance == 1:
+            def assign_enclosing(env: Environment) -> Any:
+                result = env.enclosing.values[slot] = value(env)
+                return result
+
+            return assign_enclosing
+
+        def assign_ancestor(env: Environment) -> Any:
+            result = env.ancestor(distance).values[slot] = value(env)
+            return result
+
+        return assign_ancestor
+
+    def visit_binary_expr(self, expr: Binary) -> Thunk:
+        left: Thunk = self._compile(expr.left)
+        right: Thunk = self._compile(expr.right)
+        operator: Token = expr.operator
+
+        match operator.type:
+            case TokenType.GREATER:
+                def greater(env: Environment) -> Any:
+                    a = left(env)
+                    b = right(env)
+                    if type(a) is float and type(b) is float:
+                        return a > b
+                    raise LoxRuntimeError(operator, "Operands must be numbers.")
+
+                return greater
+            case TokenType.GREATER_EQUAL:
+                def greater_equal(env: Environment) -> Any:
+                    a = left(env)
+                    b = right(env)
+                    if type(a) is float and type(b) is float:
+                        return a >= b
+                    raise LoxRuntimeError(operator, "Operands must be numbers.")
+
+                return greater_equal
+            case TokenType.LESS:
+                def less(env: Environment) -> Any:
+                    a = left(env)
+                    b = right(env)
+                    if type(a) is float and type(b) is float:
+                        return a < b
+                    raise LoxRuntimeError(operator, "Operands must be numbers.")
+
+                return less
+            case TokenType.LESS_EQUAL:
+                def less_equal(env: Environment) -> Any:
+                    a = left(env)
+                    b = right(env)
+                    if type(a) is float and type(b) is float:
+                        return a <= b
+                    raise LoxRuntimeError(operator, "Operands must be numbers.")
+
+                return less_equal
+            case TokenType.BANG_EQUAL:
+                def not_equal(env: Environment) -> Any:
+                    a = left(env)
+                    b = right(env)
+                    return (type(a) is not type(b) or a != b) and not strings_equal(a, b)
+
+                return not_equal
+            case TokenType.EQUAL_EQUAL:
+                def equal(env: Environment) -> Any:
+                    a = left(env)
+                    b = right(env)
+                    return type(a) is type(b) and a == b or strings_equal(a, b)
+
+                return equal
+            case TokenType.MINUS:
+                def subtract(env: Environment) -> Any:
+                    a = left(env)
+                    b = right(env)
+                    if type(a) is float and type(b) is float:
+                        return a - b
+                    raise LoxRuntimeError(operator, "Operands must be numbers.")
+
+                return subtract
+            case TokenType.PLUS:
+                concat = self._concat
+
+                def add(env: Environment) -> Any:
+                    a = left(env)
+                    b = right(env)
+                    if type(a) is float and type(b) is float:
+                        return a + b
+                    if (type(a) is str or type(a) is Rope) and (type(b) is str or type(b) is Rope):
+                        return concat(a, b)
+                    raise LoxRuntimeError(operator, "Operands must be two numbers or two strings.")
+
+                return add
+            case TokenType.SLASH:
+                divide_by_zero = self._divide
+
+                def divide(env: Environment) -> Any:
+                    a = left(env)
+                    b = right(env)
+                    if type(a) is float and type(b) is float:
+                        return a / b if b else divide_by_zero(a, b)
+                    raise LoxRuntimeError(operator, "Operands must be numbers.")
+
+                return divide
+            case TokenType.STAR:
+                def multiply(env: Environment) -> Any:
+                    a = left(env)
+                    b = right(env)
+                    if type(a) is float and type(b) is float:
+                        return a * b
+                    raise LoxRuntimeError(operator, "Operands must be numbers.")
+
+                return multiply
+
+    def visit_call_expr(self, expr: Call) -> Thunk:
+        arguments: list[Thunk] = [self._compile(argument) for argument in expr.arguments]
+        paren: Token = expr.paren
+        count: int = len(arguments)
+
+        # anything but a compiled function of the right arity: natives go straight to their
+        # function, anything else is checked first
+        def call_other(function: Any, values: list[Any]) -> Any:
+            if type(function) is LoxNative:
+                return function.call_at(paren, values)
+
+            if not isinstance(function, LoxCallable):
+                raise LoxRuntimeError(paren, "Can only call functions and classes.")
+
+            arity: int = function.arity()
+            if count != arity:
+                raise LoxRuntimeError(paren, f"Expected {arity} arguments but got {count}.")
+
+            try:
+                return function.call(self, values)
+            except RecursionError:
+                raise LoxRuntimeError(paren, "Stack overflow.") from None
+
+        if type(expr.callee) is Get:
+            return self._compile_invoke(expr.callee, paren, arguments, call_other)
+
+        callee: Thunk = self._compile(expr.callee)
+
+        # specialise the common small argument counts so evaluating them doesn't need a comprehension
+        if count == 0:
+            def call(env: Environment) -> Any:
+                function = callee(env)
+                if type(function) is not CompiledFunction or function.param_count != 0:
+                    return call_other(function, [])
+                try:
+                    return function.call(self, [])
+                except RecursionError:
+                    raise LoxRuntimeError(paren, "Stack overflow.") from None
+        elif count == 1:
+            argument = arguments[0]
+
+            def call(env: Environment) -> Any:
+                function = callee(env)
+                values = [argument(env)]
+                if type(function) is not CompiledFunction or function.param_count != 1:
+                    return call_other(function, values)
+                try:
+                    return function.call(self, values)
+                except RecursionError:
+                    raise LoxRuntimeError(paren, "Stack overflow.") from None
+        elif count == 2:
+            first, second = arguments
+
+            def call(env: Environment) -> Any:
+                function = callee(env)
+                values = [first(env), second(env)]
+                if type(function) is not CompiledFunction or function.param_count != 2:
+                    return call_other(function, values)
+                try:
+                    return function.call(self, values)
+                except RecursionError:
+                    raise LoxRuntimeError(paren, "Stack overflow.") from None
+        else:
+            def call(env: Environment) -> Any:
+                function = callee(env)
+                values = [argument(env) for argument in arguments]
+                if type(function) is not CompiledFunction or function.param_count != count:
+                    return call_other(function, values)
+                try:
+                    return function.call(self, values)
+                except RecursionError:
+                    raise LoxRuntimeError(paren, "Stack overflow.") from None
+
+        return call
+
+    def _compile_invoke(self, get: Get, paren: Token, arguments: list[Thunk],
+                        call_other: Callable[[Any, list[Any]], Any]) -> Thunk:
+        obj: Thunk = self._compile(get.obj)
+        name: Token = get.name
+        look_up = get.cache.look_up
+        count: int = len(arguments)
+
+        def invoke(env: Environment) -> Any:
+            receiver = obj(env)
+            if not isinstance(receiver, LoxInstance):
+                raise LoxRuntimeError(name, "Only instances have properties.")
+
+            entry = look_up(receiver, name)
+            values = [argument(env) for argument in arguments]
+
+            # a field holding a callable shadows any method with the same name
+            if type(entry) is int:
+                function = receiver.fields[entry]
+                if type(function) is not CompiledFunction or function.param_count != count:
+                    return call_other(function, values)
+                try:
+                    return function.call(self, values)
+                except RecursionError:
+                    raise LoxRuntimeError(paren, "Stack overflow.") from None
+
+            if entry.param_count != count:
+                raise LoxRuntimeError(paren, f"Expected {entry.param_count} arguments but got {count}.")
+            try:
+                return entry.invoke(self, receiver, values)
+            except RecursionError:
+                raise LoxRuntimeError(paren, "Stack overflow.") from None
+
+        return invoke
+
+    def visit_get_expr(self, expr: Get) -> Thunk:
+        obj: Thunk = self._compile(expr.obj)
+        name: Token = expr.name
+        cached_get = expr.cache.get
+
+        def get(env: Environment) -> Any:
+            instance = obj(env)
+            if isinstance(instance, LoxInstance):
+                return cached_get(instance, name)
+
+            raise LoxRuntimeError(name, "Only instances have properties.")
+
+        return get
+
+    def visit_grouping_expr(self, expr: Grouping) -> Thunk:
+        return self._compile(expr.expression)
+
+    def visit_literal_expr(self, expr: Literal) -> Thunk:
+        value: Any = expr.value
+        return lambda env: value
+
+    def visit_logical_expr(self, expr: Logical) -> Thunk:
+        left: Thunk = self._compile(expr.left)
+        right: Thunk = self._compile(expr.right)
+
+        if expr.operator.type == TokenType.OR:
+            def logical_or(env: Environment) -> Any:
+                value = left(env)
+                if value is not None and value is not False:
+                    return value
+                return right(env)
+
+            return logical_or
+
+        def logical_and(env: Environment) -> Any:
+            value = left(env)
+            if value is None or value is False:
+                return value
+            return right(env)
+
+        return logical_and
+
+    def visit_set_expr(self, expr: Set) -> Thunk:
+        obj: Thunk = self._compile(expr.obj)
+        value: Thunk = self._compile(expr.value)
+        name: Token = expr.name
+        cached_set = expr.cache.set
+
+        def set_(env: Environment) -> Any:
+            instance = obj(env)
+            if not isinstance(instance, LoxInstance):
+                raise LoxRuntimeError(name, "Only instances have fields.")
+
+            result = value(env)
+            cached_set(instance, name, result)
+            return result
+
+        return set_
+
+    def visit_super_expr(self, expr: Super) -> Thunk:
+        distance: int = expr.depth
+        method: Token = expr.method
+
+        def super_(env: Environment) -> Any:
+            superclass: LoxClass = env.ancestor(distance).values[0]
+            obj: LoxInstance = env.ancestor(distance - 1).values[0]
+
+            function: CompiledFunction = superclass.find_method(method.lexeme)
+            if function is None:
+                raise LoxRuntimeError(method, f"Undefined property '{method.lexeme}'.")
+
+            return function.bind(obj)
+
+        return super_
+
+    def visit_this_expr(self, expr: This) -> Thunk:
+        return self._compile_look_up(expr.keyword, expr)
+
+    def visit_unary_expr(self, expr: Unary) -> Thunk:
+        right: Thunk = self._compile(expr.right)
+        operator: Token = expr.operator
+
+        if operator.type == TokenType.BANG:
+            def bang(env: Environment) -> Any:
+                value = right(env)
+                return value is None or value is False
+
+            return bang
+
+        def negate(env: Environment) -> Any:
+            value = right(env)
+            if type(value) is float:
+                return -value
+            raise LoxRuntimeError(operator, "Operand must be a number.")
+
+        return negate
+
+    def visit_variable_expr(self, expr: Variable) -> Thunk:
+        return self._compile_look_up(expr.name, expr)
+
+    def _compile_look_up(self, name: Token, expr: Resolvable) -> Thunk:
+        lexeme: str = name.lexeme
+
+        distance: Optional[int] = expr.depth
+        if distance is None:
+            values = self.globals.values
+
+            def get_global(env: Environment) -> Any:
+                try:
+                    return values[lexeme]
+                except KeyError:
+                    raise LoxRuntimeError(name, f"Undefined variable '{lexeme}'.") from None
+
+            return get_global
+
+        slot: int = expr.slot
+
+        if distance == 0:
+            return lambda env: env.values[slot]
+
+        if distance == 1:
+            return lambda env: env.enclosing.values[slot]
+
+        if distance == 2:
+            return lambda env: env.enclosing.enclosing.values[slot]
+
+        return lambda env: env.ancestor(distance).values[slot]
+
+    def visit_block_stmt(self, stmt: Block) -> Thunk:
+        self._scope_depth += 1
+        body: Thunk = self._compile_sequence(stmt.statements)
+        self._scope_depth -= 1
+
+        return lambda env: body(Environment(env))
+
+    def visit_class_stmt(self, stmt: Class) -> Thunk:
+        superclass: Optional[Thunk] = None
+        if stmt.superclass is not None:
+            superclass = self._compile(stmt.superclass)
+
+        name: str = stmt.name.lexeme
+        methods: list[tuple[Function, Thunk]] = [self._compile_function(method) for method in stmt.methods]
+        is_global: bool = self._scope_depth == 0
+
+        def define_class(env: Environment) -> None:
+            parent: Optional[Any] = None
+            if superclass is not None:
+                parent = superclass(env)
+                if not isinstance(parent, LoxClass):
+                    raise LoxRuntimeError(stmt.superclass.name, "Superclass must be a class.")
+
+            env.define(name, None)
+            slot: Any = name if is_global else len(env.values) - 1
+
+            closure: Environment | GlobalEnvironment = env
+            if superclass is not None:
+                closure = Environment(env)
+                closure.define("super", parent)
+
+            functions: dict[str, CompiledFunction] = {}
+            for declaration, body in methods:
+                lexeme: str = declaration.name.lexeme
+                functions[lexeme] = CompiledFunction(declaration, body, closure, lexeme == "init")
+
+            env.values[slot] = LoxClass(name, parent, functions)
+
+        return define_class
+
+    def visit_expression_stmt(self, stmt: Expression) -> Thunk:
+        expression: Thunk = self._compile(stmt.expression)
+
+        def evaluate(env: Environment) -> None:
+            expression(env)
+
+        return evaluate
+
+    def visit_function_stmt(self, stmt: Function) -> Thunk:
+        declaration, body = self._compile_function(stmt)
+        name: str = stmt.name.lexeme
+
+        def define_function(env: Environment) -> None:
+            env.define(name, CompiledFunction(declaration, body, env, False, memo=self._memo_for(stmt)))
+
+        return define_function
+
+    def visit_if_stmt(self, stmt: If) -> Thunk:
+        condition: Thunk = self._compile(stmt.condition)
+        then_branch: Thunk = self._compile(stmt.then_branch)
+
+        if stmt.else_branch is None:
+            def if_then(env: Environment) -> Optional[tuple]:
+                value = condition(env)
+                if value is not None and value is not False:
+                    return then_branch(env)
+
+            return if_then
+
+        else_branch: Thunk = self._compile(stmt.else_branch)
+
+        def if_then_else(env: Environment) -> Optional[tuple]:
+            value = condition(env)
+            if value is not None and value is not False:
+                return then_branch(env)
+            return else_branch(env)
+
+        return if_then_else
+
+    def visit_print_stmt(self, stmt: Print) -> Thunk:
+        expression: Thunk = self._compile(stmt.expression)
+        stringify = self._stringify
+
+        def print_(env: Environment) -> None:
+            print(stringify(expression(env)))
+
+        return print_
+
+    def visit_return_stmt(self, stmt: Return) -> Thunk:
+        if stmt.value is None:
+            return lambda env: (None,)
+
+        value: Thunk = self._compile(stmt.value)
+        return lambda env: (value(env),)
+
+    def visit_var_stmt(self, stmt: Var) -> Thunk:
+        name: str = stmt.name.lexeme
+
+        if stmt.initializer is None:
+            def define_nil(env: Environment) -> None:
+                env.define(name, None)
+
+            return define_nil
+
+        initializer: Thunk = self._compile(stmt.initializer)
+
+        def define(env: Environment | GlobalEnvironment) -> None:
+            if type(env) is GlobalEnvironment:
+                env.define(name, initializer(env))
+                return
+
+            # the resolver has already given a local its slot, which its initializer may assign to
+            slot = len(env.values)
+            env.define(name, None)
+            env.values[slot] = initializer(env)
+
+        return define
+
+    def visit_while_stmt(self, stmt: While) -> Thunk:
+        body: Thunk = self._compile(stmt.body)
+
+        if stmt.condition is None:
+            def loop(env: Environment) -> Optional[tuple]:
+                while True:
+                    completion = body(env)
+                    if completion is not None:
+                        return completion
+
+            return loop
+
+        condition: Thunk = self._compile(stmt.condition)
+
+        def while_(env: Environment) -> Optional[tuple]:
+            while True:
+                value = condition(env)
+                if value is None or value is False:
+                    return None
+
+                completion = body(env)
+                if completion is not None:
+                    return completion
+
+        return while_
+
+    def _compile(self, node: Expr | Stmt) -> Thunk:
+        return node.accept(self)
+
+    def _compile_function(self, declaration: Function) -> tuple[Function, Thunk]:
+        self._scope_depth += 1
+        body: Thunk = self._compile_sequence(declaration.body)
+        self._scope_depth -= 1
+
+        return declaration, body
+
+    def _compile_sequence(self, statements: list[Stmt]) -> Thunk:
+        thunks: list[Thunk] = [self._compile(statement) for statement in statements]
+
+        if len(thunks) == 0:
+            return lambda env: None
+
+        if len(thunks) == 1:
+            return thunks[0]
+
+        def sequence(env: Environment) -> Optional[tuple]:
+            for thunk in thunks:
+                completion = thunk(env)
+                if completion is not None:
+                    return completion
+
+        return sequence
@@ -0,0 +1,90 @@
+from __future__ import annotations
+from typing import Any, Callable, Final
+
+from .rope import Rope
+
+# lists and maps being printed, so one that contains itself prints as [...] or {...} rather than forever
+_printing: Final[set[int]] = set()
+
+
+class LoxList:
+    # A growable list backed by a Python list. It has no methods of its own in Lox: the list
+    # natives work on it host-side, so indexing is a single native call rather than a walk
+    # down a chain of instances.
+
+    __slots__ = ("items",)
+
+    def __init__(self, items: list[Any]):
+        self.items: Final = items
+
+    def stringify(self, stringify: Callable[[Any], str]) -> str:
+        if id(self) in _printing:
+            return "[...]"
+
+        _printing.add(id(self))
+        try:
+            return "[" + ", ".join(_quoted(item, stringify) for item in self.items) + "]"
+        finally:
+            _printing.discard(id(self))
+
+
+class LoxMap:
+    # A hash map backed by a Python dict, keyed by strings, numbers, booleans and nil with the
+    # same equality as ==. Python's own keys don't quite agree: true would find the entry for 1
+    # and NaN the entry for the same NaN, so booleans are stored as boxes of their own and every
+    # NaN gets a fresh box, which no later NaN finds.
+
+    __slots__ = ("entries",)
+
+    def __init__(self):
+        self.entries: Final[dict[Any, Any]] = {}
+
+    def keys(self) -> list[Any]:
+        return [key.value if type(key) is _Box else key for key in self.entries]
+
+    def stringify(self, stringify: Callable[[Any], str]) -> str:
+        if id(self) in _printing:
+            return "{...}"
+
+        _printing.add(id(self))
+        try:
+            return "{" + ", ".join(
+                f"{_quoted(key.value if type(key) is _Box else key, stringify)}: {_quoted(value, stringify)}"
+                for key, value in self.entries.items()
+            ) + "}"
+        finally:
+            _printing.discard(id(self))
+
+
+class _Box:
+    # hashes and compares by identity, whatever it holds
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value: Final = value
+
+
+_TRUE: Final = _Box(True)
+_FALSE: Final = _Box(False)
+
+
+def dict_key(key: Any) -> Any:
+    # the key a Lox string, number, boolean or nil is stored under
+    if type(key) is bool:
+        return _TRUE if key else _FALSE
+
+    if type(key) is float and key != key:
+        return _Box(key)
+
+    return key
+
+
+def _quoted(value: Any, stringify: Callable[[Any], str]) -> str:
+    # strings are quoted inside a list or map, so ["1"] and [1] print differently
+    if type(value) is str or type(value) is Rope:
+        return f'"{value}"'
+
+    if type(value) is LoxList or type(value) is LoxMap:
+        return value.stringify(stringify)
+
+    return stringify(value)
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, Any, Final
+from typing import TYPE_CHECKING, Any, Final, Union
 
 from .errors import LoxRuntimeError
 
@@ -7,39 +7,53 @@ if TYPE_CHECKING:
     from .tokens import Token
 
 
-class Environment:
-    def __init__(self, enclosing: Environment = None):
-        self.enclosing: Final = enclosing
-        self._values: Final[dict[str, Any]] = dict()
+class GlobalEnvironment:
+    __slots__ = ("values",)
 
-    def get(self, name: Token) -> Any:
-        if name.lexeme in self._values.keys():
-            return self._values[name.lexeme]
+    def __init__(self):
+        self.values: Final[dict[str, Any]] = dict()
 
-        if self.enclosing is not None:
-            return self.enclosing.get(name)
+    def get(self, name: Token) -> Any:
+        if name.lexeme in self.values.keys():
+            return self.values[name.lexeme]
 
         raise LoxRuntimeError(name, f"Undefined variable '{name.lexeme}'.")
 
-    def get_at(self, distance: int, name: str) -> Any:
-        return self.ancestor(distance)._values[name]
-
     def assign(self, name: Token, value: Any) -> None:
-        if name.lexeme in self._values.keys():
-            self._values[name.lexeme] = value
-            return
-
-        if self.enclosing is not None:
-            self.enclosing.assign(name, value)
+        if name.lexeme in self.values.keys():
+            self.values[name.lexeme] = value
             return
 
         raise LoxRuntimeError(name, f"Undefined variable '{name.lexeme}'.")
 
-    def assign_at(self, distance: int, name: Token, value: Any) -> None:
-        self.ancestor(distance)._values[name.lexeme] = value
+    def define(self, name: str, value: Any) -> None:
+        self.values[name] = value
+
+
+class Environment:
+    # Locals live in a frame of slots, in declaration order; the resolver hands out the same
+    # slot indexes, so variables are found by (distance, slot) instead of by name.
+
+    __slots__ = ("enclosing", "values")
+
+    def __init__(self, enclosing: Union[Environment, GlobalEnvironment]):
+        self.enclosing: Final = enclosing
+        self.values: Final[list[Any]] = []
+
+    def get_at(self, distance: int, slot: int) -> Any:
+        if distance == 0:
+            return self.values[slot]
+
+        return self.ancestor(distance).values[slot]
+
+    def assign_at(self, distance: int, slot: int, value: Any) -> None:
+        if distance == 0:
+            self.values[slot] = value
+        else:
+            self.ancestor(distance).values[slot] = value
 
     def define(self, name: str, value: Any) -> None:
-        self._values[name] = value
+        self.values.append(value)
 
     def ancestor(self, distance: int) -> Environment:
         environment: Environment = self
@@ -1,7 +1,9 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import TYPE_CHECKING, Any
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Optional
+
+from .shape import InlineCache
 
 if TYPE_CHECKING:
     from .tokens import Token
@@ -9,21 +11,42 @@ if TYPE_CHECKING:
 
 
 class Expr(ABC):
+    # nodes compare and hash by identity, so they can key the interpreters' side tables
+    __slots__ = ()
+
     @abstractmethod
     def accept(self, visitor: ExprVisitor) -> Any:
         pass
 
+    def __reduce__(self) -> tuple:
+        # pickled as a constructor call, which is smaller and quicker to load than the slots,
+        # and starts the node over with empty caches
+        return type(self), tuple(getattr(self, name) for name in self.__match_args__)
+
+
+@dataclass(eq=False, slots=True)
+class Resolvable(Expr):
+    # A node naming a variable. The resolver stores where the variable lives on the node itself:
+    # depth scopes out from where it is used and at slot in that scope, with depth None for a
+    # global. Nothing outside the tree refers to the node, so it is freed along with it.
+    depth: Optional[int] = field(default=None, init=False, repr=False, compare=False)
+    slot: int = field(default=0, init=False, repr=False, compare=False)
+
+    def __reduce__(self) -> tuple:
+        constructor, arguments = Expr.__reduce__(self)
+        return constructor, arguments, (None, {"depth": self.depth, "slot": self.slot})
 
-class Assign(Expr):
-    def __init__(self, name: Token, value: Expr):
-        self.name = name
-        self.value = value
+
+@dataclass(eq=False, slots=True)
+class Assign(Resolvable):
+    name: Token
+    value: Expr
 
     def accept(self, visitor: ExprVisitor) -> Any:
         return visitor.visit_assign_expr(self)
 
 
-@dataclass
+@dataclass(eq=False, slots=True)
 class Binary(Expr):
     left: Expr
     operator: Token
@@ -33,7 +56,7 @@ class Binary(Expr):
         return visitor.visit_binary_expr(self)
 
 
-@dataclass
+@dataclass(eq=False, slots=True)
 class Call(Expr):
     callee: Expr
     paren: Token
@@ -43,16 +66,17 @@ class Call(Expr):
         return visitor.visit_call_expr(self)
 
 
-@dataclass
+@dataclass(eq=False, slots=True)
 class Get(Expr):
     obj: Expr
     name: Token
+    cache: InlineCache = field(default_factory=InlineCache, init=False, repr=False, compare=False)
 
     def accept(self, visitor: ExprVisitor) -> Any:
         return visitor.visit_get_expr(self)
 
 
-@dataclass
+@dataclass(eq=False, slots=True)
 class Grouping(Expr):
     expression: Expr
 
@@ -60,7 +84,7 @@ class Grouping(Expr):
         return visitor.visit_grouping_expr(self)
 
 
-@dataclass
+@dataclass(eq=False, slots=True)
 class Literal(Expr):
     value: Any
 
@@ -68,7 +92,7 @@ class Literal(Expr):
         return visitor.visit_literal_expr(self)
 
 
-@dataclass
+@dataclass(eq=False, slots=True)
 class Logical(Expr):
     left: Expr
     operator: Token
@@ -78,34 +102,35 @@ class Logical(Expr):
         return visitor.visit_logical_expr(self)
 
 
-@dataclass
+@dataclass(eq=False, slots=True)
 class Set(Expr):
     obj: Expr
     name: Token
     value: Expr
+    cache: InlineCache = field(default_factory=InlineCache, init=False, repr=False, compare=False)
 
     def accept(self, visitor: ExprVisitor) -> Any:
         return visitor.visit_set_expr(self)
 
 
-class Super(Expr):
-    def __init__(self, keyword: Token, method: Token):
-        self.keyword = keyword
-        self.method = method
+@dataclass(eq=False, slots=True)
+class Super(Resolvable):
+    keyword: Token
+    method: Token
 
     def accept(self, visitor: ExprVisitor) -> Any:
         return visitor.visit_super_expr(self)
 
 
-class This(Expr):
-    def __init__(self, keyword: Token):
-        self.keyword = keyword
+@dataclass(eq=False, slots=True)
+class This(Resolvable):
+    keyword: Token
 
     def accept(self, visitor: ExprVisitor) -> Any:
         return visitor.visit_this_expr(self)
 
 
-@dataclass
+@dataclass(eq=False, slots=True)
 class Unary(Expr):
     operator: Token
     right: Expr
@@ -114,9 +139,9 @@ class Unary(Expr):
         return visitor.visit_unary_expr(self)
 
 
-class Variable(Expr):
-    def __init__(self, name: Token):
-        self.name = name
+@dataclass(eq=False, slots=True)
+class Variable(Resolvable):
+    name: Token
 
     def accept(self, visitor: ExprVisitor) -> Any:
         return visitor.visit_variable_expr(self)
@@ -1,46 +1,58 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, Any, Final
+from typing import TYPE_CHECKING, Any, Final, Optional
 
 from .callable import LoxCallable
 from .environment import Environment
-from .exceptions import LoxReturn
 
 if TYPE_CHECKING:
     from .callable import LoxInstance
     from .interpreter import Interpreter
+    from .memo import MemoCache
     from .stmt import Function
 
 
 class LoxFunction(LoxCallable):
-    def __init__(self, declaration: Function, closure: Environment, is_initializer: bool):
+    __slots__ = ("_declaration", "_closure", "_is_initializer", "_this", "_memo")
+
+    def __init__(self, declaration: Function, closure: Environment, is_initializer: bool,
+                 this: Optional[LoxInstance] = None, memo: Optional[MemoCache] = None):
         self._declaration: Final = declaration
         self._closure: Final = closure
         self._is_initializer: Final = is_initializer
+        self._this: Final = this
+        self._memo: Final = memo
 
     def bind(self, instance: LoxInstance) -> LoxFunction:
-        environment = Environment(self._closure)
-        environment.define("this", instance)
-        return LoxFunction(self._declaration, environment, self._is_initializer)
+        return LoxFunction(self._declaration, self._closure, self._is_initializer, instance)
 
     def arity(self) -> int:
         return len(self._declaration.params)
 
     def call(self, interpreter: Interpreter, arguments: list[Any]) -> Any:
+        if self._memo is not None:
+            return self._memo.call(self, interpreter, arguments)
+
+        return self.invoke(interpreter, self._this, arguments)
+
+    def invoke(self, interpreter: Interpreter, this: Optional[LoxInstance], arguments: list[Any]) -> Any:
         environment: Environment = Environment(self._closure)
 
-        for i in range(len(self._declaration.params)):
-            environment.define(self._declaration.params[i].lexeme, arguments[i])
+        # a method's receiver lives in slot 0 of its frame, ahead of the parameters
+        if this is not None:
+            environment.values.append(this)
+        environment.values.extend(arguments)
 
-        try:
-            interpreter.execute_block(self._declaration.body, environment)
-        except LoxReturn as r:
-            if self._is_initializer:
-                return self._closure.get_at(0, "this")
+        declaration: Function = self._declaration
+        if declaration.lazy is not None:
+            declaration.lazy.force(declaration)
 
-            return r.value
+        completion: Optional[tuple] = interpreter.execute_block(declaration.body, environment)
 
         if self._is_initializer:
-            return self._closure.get_at(0, "this")
+            return this
+
+        if completion is not None:
+            return completion[0]
 
     def __str__(self):
         return f"<fn {self._declaration.name.lexeme}>"
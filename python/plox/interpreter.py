@@ -1,29 +1,38 @@
-import time
+import math
 from typing import Any, Final, Optional
 
 from .callable import LoxCallable, LoxClass, LoxInstance
-from .environment import Environment
-from .errors import LoxErrors, LoxRuntimeError
-from .exceptions import LoxReturn
-from .expr import Assign, Expr, Unary, Literal, Grouping, Binary, Variable, Logical, Call, Get, Set, This, Super
+from .containers import LoxList, LoxMap
+from .environment import Environment, GlobalEnvironment
+from .errors import LoxErrors, LoxRuntimeError, ParseError
+from .expr import Assign, Expr, Unary, Literal, Grouping, Binary, Variable, Logical, Call, Get, Set, This, Super, Resolvable
 from .function import LoxFunction
+from .memo import MemoCache
+from .natives import NATIVES, LoxNative
+from .rope import Rope, concat, concat_interned, strings_equal
+from .quickening import INTERNING_SPECIALIZATIONS, SPECIALIZATIONS, GenericBinary, QuickenedBinary
 from .stmt import Stmt, Print, Expression, Var, Block, If, While, Function, Return, Class
 from .tokens import Token, TokenType
 from .visitor import ExprVisitor, StmtVisitor
 
 
 class Interpreter(ExprVisitor, StmtVisitor):
-    def __init__(self):
-        self.globals: Final = Environment()
-        self._environment = self.globals
+    def __init__(self, intern_strings: bool = False):
+        self.globals: Final = GlobalEnvironment()
+        self._environment: Environment | GlobalEnvironment = self.globals
 
-        self._locals: Final[dict[Expr, int]] = {}
+        self._pure: Final[set[Function]] = set()
+        self._memos: Final[list[MemoCache]] = []
 
-        self.globals.define("clock", type("", (LoxCallable,), {
-            "arity": lambda self: 0,
-            "call": lambda self, interpreter, arguments: time.time(),
-            "__str__": lambda self: "<native fn>"
-        }))
+        # like clox's string table, interning concatenations lets equal strings compare by identity
+        self._specializations: Final = INTERNING_SPECIALIZATIONS if intern_strings else SPECIALIZATIONS
+        self._concat: Final = concat_interned if intern_strings else concat
+
+        self._quickened = 0
+        self._deoptimized = 0
+
+        for name, native in NATIVES.items():
+            self.globals.define(name, native)
 
     def interpret(self, statements: list[Stmt]) -> None:
         try:
@@ -31,16 +40,32 @@ class Interpreter(ExprVisitor, StmtVisitor):
                 self._execute(statement)
         except LoxRuntimeError as e:
             LoxErrors.runtime_error(e)
+        except ParseError:
+            # in a lazily parsed function body, and already reported
+            pass
+
+    def mark_pure(self, function: Function) -> None:
+        self._pure.add(function)
 
-    def resolve(self, expr: Expr, depth: int) -> None:
-        self._locals[expr] = depth
+    def stats(self) -> dict[str, int]:
+        stats: dict[str, int] = {"nodes quickened": self._quickened, "nodes deoptimized": self._deoptimized}
+
+        if len(self._memos) != 0:
+            hits: int = sum(memo.hits for memo in self._memos)
+            misses: int = sum(memo.misses for memo in self._memos)
+            stats["memo hits"] = hits
+            stats["memo misses"] = misses
+            stats["memo evictions"] = sum(memo.evictions for memo in self._memos)
+            stats["memo hit rate %"] = round(100 * hits / max(hits + misses, 1))
+
+        return stats
 
     def visit_assign_expr(self, expr: Assign) -> Any:
         value: Any = self._evaluate(expr.value)
 
-        distance: int = self._locals.get(expr)
+        distance: Optional[int] = expr.depth
         if distance is not None:
-            self._environment.assign_at(distance, expr.name, value)
+            self._environment.assign_at(distance, expr.slot, value)
         else:
             self.globals.assign(expr.name, value)
 
@@ -50,58 +75,122 @@ class Interpreter(ExprVisitor, StmtVisitor):
         left: Any = self._evaluate(expr.left)
         right: Any = self._evaluate(expr.right)
 
-        match expr.operator.type:
+        if type(expr) is Binary and type(left) is type(right):
+            specialization: Optional[type[QuickenedBinary]] = self._specializations.get((expr.operator.type, type(left)))
+            if specialization is not None:
+                expr.__class__ = specialization
+                self._quickened += 1
+
+        return self._binary_operation(expr.operator, left, right)
+
+    def visit_quickened_binary_expr(self, expr: QuickenedBinary) -> Any:
+        left: Any = self._evaluate(expr.left)
+        right: Any = self._evaluate(expr.right)
+
+        if type(left) is expr.operand_type and type(right) is expr.operand_type:
+            try:
+                return expr.operation(left, right)
+            except ZeroDivisionError:
+                return self._divide(left, right)
+
+        expr.__class__ = GenericBinary
+        self._deoptimized += 1
+        return self._binary_operation(expr.operator, left, right)
+
+    def _binary_operation(self, operator: Token, left: Any, right: Any) -> Any:
+        match operator.type:
             case TokenType.GREATER:
-                self._check_number_operands(expr.operator, left, right)
+                self._check_number_operands(operator, left, right)
                 return left > right
             case TokenType.GREATER_EQUAL:
-                self._check_number_operands(expr.operator, left, right)
+                self._check_number_operands(operator, left, right)
                 return left >= right
             case TokenType.LESS:
-                self._check_number_operands(expr.operator, left, right)
+                self._check_number_operands(operator, left, right)
                 return left < right
             case TokenType.LESS_EQUAL:
-                self._check_number_operands(expr.operator, left, right)
+                self._check_number_operands(operator, left, right)
                 return left <= right
             case TokenType.BANG_EQUAL:
                 return not self._is_equal(left, right)
             case TokenType.EQUAL_EQUAL:
                 return self._is_equal(left, right)
             case TokenType.MINUS:
-                self._check_number_operands(expr.operator, left, right)
+                self._check_number_operands(operator, left, right)
                 return left - right
             case TokenType.PLUS:
-                if (type(left) is float and type(right) is float) or (type(left) is str and type(right) is str):
+                if type(left) is float and type(right) is float:
                     return left + right
 
-                raise LoxRuntimeError(expr.operator, "Operands must be two numbers or two strings.")
+                if (type(left) is str or type(left) is Rope) and (type(right) is str or type(right) is Rope):
+                    return self._concat(left, right)
+
+                raise LoxRuntimeError(operator, "Operands must be two numbers or two strings.")
             case TokenType.SLASH:
-                self._check_number_operands(expr.operator, left, right)
-                return left / right
+                self._check_number_operands(operator, left, right)
+                return self._divide(left, right)
             case TokenType.STAR:
-                self._check_number_operands(expr.operator, left, right)
+                self._check_number_operands(operator, left, right)
                 return left * right
 
     def visit_call_expr(self, expr: Call) -> Any:
+        if type(expr.callee) is Get:
+            return self._invoke(expr, expr.callee)
+
         callee: Any = self._evaluate(expr.callee)
 
         arguments: list[Any] = []
         for argument in expr.arguments:
             arguments.append(self._evaluate(argument))
 
+        return self._call(expr.paren, callee, arguments)
+
+    def _invoke(self, expr: Call, get: Get) -> Any:
+        receiver: Any = self._evaluate(get.obj)
+        if not isinstance(receiver, LoxInstance):
+            raise LoxRuntimeError(get.name, "Only instances have properties.")
+
+        entry: Any = get.cache.look_up(receiver, get.name)
+
+        arguments: list[Any] = []
+        for argument in expr.arguments:
+            arguments.append(self._evaluate(argument))
+
+        # a field holding a callable shadows any method with the same name
+        if type(entry) is int:
+            return self._call(expr.paren, receiver.fields[entry], arguments)
+
+        method: LoxFunction = entry
+        if len(arguments) != method.arity():
+            raise LoxRuntimeError(expr.paren, f"Expected {method.arity()} arguments but got {len(arguments)}.")
+
+        try:
+            return method.invoke(self, receiver, arguments)
+        except RecursionError:
+            raise LoxRuntimeError(expr.paren, "Stack overflow.") from None
+
+    def _call(self, paren: Token, callee: Any, arguments: list[Any]) -> Any:
+        if type(callee) is LoxNative:
+            return callee.call_at(paren, arguments)
+
         if not isinstance(callee, LoxCallable):
-            raise LoxRuntimeError(expr.paren, "Can only call functions and classes.")
+            raise LoxRuntimeError(paren, "Can only call functions and classes.")
 
         function: LoxCallable = callee
-        if len(arguments) != function.arity():
-            raise LoxRuntimeError(expr.paren, f"Expected {function.arity()} arguments but got {len(arguments)}.")
+        arity: int = function.arity()
+        if len(arguments) != arity:
+            raise LoxRuntimeError(paren, f"Expected {arity} arguments but got {len(arguments)}.")
 
-        return function.call(self, arguments)
+        # Lox calls nest Python calls, so running out of Python stack is the program's stack overflow
+        try:
+            return function.call(self, arguments)
+        except RecursionError:
+            raise LoxRuntimeError(paren, "Stack overflow.") from None
 
     def visit_get_expr(self, expr: Get) -> Any:
         obj: Any = self._evaluate(expr.obj)
         if isinstance(obj, LoxInstance):
-            return obj.get(expr.name)
+            return expr.cache.get(obj, expr.name)
 
         raise LoxRuntimeError(expr.name, "Only instances have properties.")
 
@@ -130,13 +219,13 @@ class Interpreter(ExprVisitor, StmtVisitor):
             raise LoxRuntimeError(expr.name, "Only instances have fields.")
 
         value: Any = self._evaluate(expr.value)
-        obj.set(expr.name, value)
+        expr.cache.set(obj, expr.name, value)
         return value
 
     def visit_super_expr(self, expr: Super) -> Any:
-        distance: int = self._locals[expr]
-        superclass: LoxClass = self._environment.get_at(distance, "super")
-        obj: LoxInstance = self._environment.get_at(distance - 1, "this")
+        distance: int = expr.depth
+        superclass: LoxClass = self._environment.get_at(distance, 0)
+        obj: LoxInstance = self._environment.get_at(distance - 1, 0)
 
         method: LoxFunction = superclass.find_method(expr.method.lexeme)
 
@@ -161,15 +250,15 @@ class Interpreter(ExprVisitor, StmtVisitor):
     def visit_variable_expr(self, expr: Variable) -> Any:
         return self._look_up_variable(expr.name, expr)
 
-    def _look_up_variable(self, name: Token, expr: Expr) -> Any:
-        distance: int = self._locals.get(expr)
+    def _look_up_variable(self, name: Token, expr: Resolvable) -> Any:
+        distance: Optional[int] = expr.depth
         if distance is not None:
-            return self._environment.get_at(distance, name.lexeme)
+            return self._environment.get_at(distance, expr.slot)
         else:
             return self.globals.get(name)
 
-    def visit_block_stmt(self, stmt: Block) -> None:
-        self.execute_block(stmt.statements, Environment(self._environment))
+    def visit_block_stmt(self, stmt: Block) -> Optional[tuple]:
+        return self.execute_block(stmt.statements, Environment(self._environment))
 
     def visit_class_stmt(self, stmt: Class) -> None:
         superclass: Optional[Any] = None
@@ -194,42 +283,62 @@ class Interpreter(ExprVisitor, StmtVisitor):
         if superclass is not None:
             self._environment = self._environment.enclosing
 
-        self._environment.assign(stmt.name, klass)
+        if self._environment is self.globals:
+            self.globals.assign(stmt.name, klass)
+        else:
+            # nothing else is declared in this scope while the class is built, so its slot is the last one
+            self._environment.values[-1] = klass
 
     def visit_expression_stmt(self, stmt: Expression) -> None:
         self._evaluate(stmt.expression)
 
     def visit_function_stmt(self, stmt: Function) -> None:
-        function = LoxFunction(stmt, self._environment, False)
+        function = LoxFunction(stmt, self._environment, False, memo=self._memo_for(stmt))
         self._environment.define(stmt.name.lexeme, function)
 
-    def visit_if_stmt(self, stmt: If) -> None:
+    def visit_if_stmt(self, stmt: If) -> Optional[tuple]:
         if self._is_truthy(self._evaluate(stmt.condition)):
-            self._execute(stmt.then_branch)
+            return self._execute(stmt.then_branch)
         elif stmt.else_branch is not None:
-            self._execute(stmt.else_branch)
+            return self._execute(stmt.else_branch)
 
     def visit_print_stmt(self, stmt: Print) -> None:
         value: Any = self._evaluate(stmt.expression)
         print(self._stringify(value))
 
-    def visit_return_stmt(self, stmt: Return) -> None:
+    def visit_return_stmt(self, stmt: Return) -> tuple:
         value: Any = None
         if stmt.value is not None:
             value = self._evaluate(stmt.value)
 
-        raise LoxReturn(value)
+        return (value,)
 
     def visit_var_stmt(self, stmt: Var) -> None:
-        value: Any = None
-        if stmt.initializer is not None:
-            value = self._evaluate(stmt.initializer)
-
-        self._environment.define(stmt.name.lexeme, value)
-
-    def visit_while_stmt(self, stmt: While) -> None:
-        while self._is_truthy(self._evaluate(stmt.condition)):
-            self._execute(stmt.body)
+        environment: Environment | GlobalEnvironment = self._environment
+        if stmt.initializer is None:
+            environment.define(stmt.name.lexeme, None)
+        elif type(environment) is GlobalEnvironment:
+            environment.define(stmt.name.lexeme, self._evaluate(stmt.initializer))
+        else:
+            # the resolver has already given a local its slot, which its initializer may assign to
+            slot: int = len(environment.values)
+            environment.define(stmt.name.lexeme, None)
+            environment.values[slot] = self._evaluate(stmt.initializer)
+
+    def visit_while_stmt(self, stmt: While) -> Optional[tuple]:
+        # the optimizer drops the condition of loops that can only be exited by returning
+        while stmt.condition is None or self._is_truthy(self._evaluate(stmt.condition)):
+            completion: Optional[tuple] = self._execute(stmt.body)
+            if completion is not None:
+                return completion
+
+    def _memo_for(self, function: Function) -> Optional[MemoCache]:
+        if function not in self._pure:
+            return None
+
+        memo = MemoCache()
+        self._memos.append(memo)
+        return memo
 
     def _check_number_operand(self, operator: Token, operand: Any) -> None:
         if type(operand) is float:
@@ -253,40 +362,63 @@ class Interpreter(ExprVisitor, StmtVisitor):
         return True
 
     def _is_equal(self, a: Any, b: Any) -> bool:
-        if a is None and b is None:
-            return True
+        # an object is equal to itself, except NaN
+        if a is b:
+            return a == a
 
-        if a is None:
-            return False
+        return type(a) is type(b) and a == b or strings_equal(a, b)
+
+    def _divide(self, left: float, right: float) -> float:
+        if right != 0.0:
+            return left / right
 
-        return a == b
+        if left == 0.0 or math.isnan(left):
+            return math.nan
+
+        return math.copysign(math.inf, left) * math.copysign(1.0, right)
 
     def _stringify(self, obj: Any) -> str:
         if obj is None:
             return "nil"
 
+        if type(obj) is bool:
+            return "true" if obj else "false"
+
         if type(obj) is float:
+            if math.isnan(obj):
+                return "NaN"
+
+            if math.isinf(obj):
+                return "Infinity" if obj > 0 else "-Infinity"
+
             text = str(obj)
             if text.endswith(".0"):
                 text = text[0:len(text) - 2]
 
             return text
 
+        if type(obj) is LoxList or type(obj) is LoxMap:
+            return obj.stringify(self._stringify)
+
         return str(obj)
 
     def _evaluate(self, expr: Expr) -> Any:
         return expr.accept(self)
 
-    def _execute(self, stmt: Stmt) -> None:
-        stmt.accept(self)
+    # statements evaluate to None, or to a one-element tuple holding the returned value once a
+    # return statement has executed; blocks, ifs and loops stop and pass that completion up
+    def _execute(self, stmt: Stmt) -> Optional[tuple]:
+        return stmt.accept(self)
 
-    def execute_block(self, statements: list[Stmt], environment: Environment) -> None:
-        previous: Environment = self._environment
+    def execute_block(self, statements: list[Stmt], environment: Environment) -> Optional[tuple]:
+        previous: Environment | GlobalEnvironment = self._environment
 
         try:
             self._environment = environment
 
             for statement in statements:
-                self._execute(statement)
+                completion: Optional[tuple] = self._execute(statement)
+                if completion is not None:
+                    return completion
         finally:
             self._environment = previous
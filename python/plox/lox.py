@@ -1,42 +1,140 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Final
+from typing import TYPE_CHECKING, Final, Optional, TextIO
 
+from .ast_printer import AstPrinter
+from .cache import ProgramCache, Resolution
+from .closure_interpreter import ClosureInterpreter
 from .errors import LoxErrors
 from .interpreter import Interpreter
-from .parser import Parser
+from .optimizer import Optimizer
+from .parser import PrattParser
+from .purity import PurityResolver
 from .resolver import Resolver
-from .scanner import Scanner
+from .scanner import ChunkedScanner, RegexStreamScanner
+from .tokens import TokenBuffer
+from .transpiler import TranspilingInterpreter
+from .vm import VM
 
 if TYPE_CHECKING:
     from .stmt import Stmt
-    from .tokens import Token
+    from .tokens import TokenStream
 
 
 class Lox:
-    interpreter: Final = Interpreter()
+    engines: Final = {
+        "tree": Interpreter,
+        "closure": ClosureInterpreter,
+        "vm": VM,
+        "python": TranspilingInterpreter,
+    }
 
-    def run(self, pgm: str):
-        scanner = Scanner(pgm)
-        tokens: list[Token] = scanner.scan_tokens()
-        parser = Parser(tokens)
-        statements: list[Stmt] = parser.parse()
+    def __init__(self, engine: str = "tree", optimizer: Optional[Optimizer] = None, print_ast: bool = False,
+                 memoize: bool = False, intern_strings: bool = False, lazy: bool = False):
+        self.interpreter: Final[Interpreter | VM] = Lox.engines[engine](intern_strings=intern_strings)
+        self.optimizer: Final = optimizer
+        self._print_ast: Final = print_ast
+        self._memoize: Final = memoize
+        self._lazy: Final = lazy
 
-        if LoxErrors.had_error:
-            return
+    def run(self, pgm: str, cache: Optional[ProgramCache] = None):
+        # a lazily parsed program is mostly tokens yet to be parsed, which the cache doesn't keep
+        if self._lazy:
+            cache = None
+
+        program: Optional[tuple[list[Stmt], Resolution]] = cache.load(pgm) if cache is not None else None
+        if program is None:
+            scanner = RegexStreamScanner(pgm)
+            tokens: TokenStream = scanner.scan_tokens()
+            parser = PrattParser(tokens, self._lazy)
+            statements: list[Stmt] = parser.parse()
+
+            if LoxErrors.had_error:
+                return
+
+            resolution = Resolution()
+            resolver: Resolver = PurityResolver(resolution) if self._memoize else Resolver()
+            resolver.resolve_statements(statements)
+
+            if LoxErrors.had_error:
+                return
+
+            # stored before the optimizer rewrites the program, which depends on the options
+            if cache is not None:
+                cache.store(pgm, statements, resolution)
+        else:
+            statements, resolution = program
+
+        resolution.apply(self.interpreter)
+        self._execute(statements)
+
+    def check(self, pgm: str):
+        # Reports every error the front end can find without running anything: all of the
+        # program is parsed and resolved, however the program would be run.
+        statements: list[Stmt] = PrattParser(RegexStreamScanner(pgm).scan_tokens()).parse()
+
+        if not LoxErrors.had_error:
+            Resolver().resolve_statements(statements)
 
-        resolver = Resolver(Lox.interpreter)
-        resolver.resolve_statements(statements)
+    def run_stream(self, reader: TextIO):
+        # Runs each top-level declaration as soon as it has been read, so output starts before
+        # the end of the file and only the declaration being run has to be held in memory. It can
+        # only check what it has read: code before a syntax error has already run by the time
+        # it is found. Purity analysis needs the whole program, so memoisation isn't available.
+        scanner = ChunkedScanner(reader)
+        parser = PrattParser(TokenBuffer(scanner.scan_stream()))
+        resolver = Resolver()
 
-        if LoxErrors.had_error:
+        syntax_error: bool = False
+        resolve_error: bool = False
+        for statement in parser.declarations():
+            # after a syntax error the rest is only parsed, to report any further ones; after a
+            # resolution error it is still resolved, but nothing more is run
+            if statement is None or LoxErrors.had_error and not resolve_error:
+                syntax_error = True
+            if syntax_error:
+                continue
+
+            resolver.resolve_statements([statement])
+            resolve_error = LoxErrors.had_error
+            if resolve_error:
+                continue
+
+            self._execute([statement])
+            if LoxErrors.had_runtime_error:
+                return
+
+    def _execute(self, statements: list[Stmt]):
+        if self.optimizer is not None:
+            statements = self.optimizer.optimize(statements)
+
+        if self._print_ast:
+            print(AstPrinter().print_program(statements))
             return
 
-        Lox.interpreter.interpret(statements)
+        self.interpreter.interpret(statements)
 
     def run_prompt(self):
+        # Each line is scanned, parsed and resolved on its own, carrying on from the lines before
+        # it: the scanner's line count runs across the session and one resolver sees every line.
+        # Resolution lives on the nodes, so nothing is kept for a line once it has run, except
+        # what it defined.
+        resolver = Resolver()
+        line: int = 1
         while True:
-            line = input("> ")
-            if not line:
+            source: str = input("> ")
+            if not source:
                 break
-            self.run(line)
+
+            scanner = RegexStreamScanner(source)
+            scanner.line = line
+            statements: list[Stmt] = PrattParser(scanner.scan_tokens()).parse()
+            line += 1
+
+            if not LoxErrors.had_error:
+                resolver.resolve_statements(statements)
+
+            if not LoxErrors.had_error:
+                self._execute(statements)
+
             LoxErrors.had_error = False
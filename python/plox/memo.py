@@ -0,0 +1,52 @@
+from __future__ import annotations
+import math
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Final, Optional
+
+if TYPE_CHECKING:
+    from .callable import LoxCallable
+    from .interpreter import Interpreter
+
+MEMO_CAPACITY: Final = 4096
+
+
+class MemoCache:
+    # Results of a pure function keyed by its arguments, evicting the least recently used entry
+    # once it holds MEMO_CAPACITY of them. Runtime errors propagate and are never cached.
+
+    def __init__(self, capacity: int = MEMO_CAPACITY):
+        self._capacity: Final = capacity
+        self._entries: Final[OrderedDict[tuple, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def call(self, function: LoxCallable, interpreter: Interpreter, arguments: list[Any]) -> Any:
+        key: Optional[tuple] = _key(arguments)
+        if key is None:
+            return function.invoke(interpreter, None, arguments)
+
+        entries = self._entries
+        if key in entries:
+            self.hits += 1
+            entries.move_to_end(key)
+            return entries[key]
+
+        self.misses += 1
+        result: Any = function.invoke(interpreter, None, arguments)
+
+        entries[key] = result
+        if len(entries) > self._capacity:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+        return result
+
+
+def _key(arguments: list[Any]) -> Optional[tuple]:
+    # Python treats true as 1 and -0 as 0 when comparing keys, but Lox tells them apart
+    for argument in arguments:
+        if type(argument) is bool or argument == 0.0 and math.copysign(1.0, argument) < 0.0:
+            return None
+
+    return tuple(arguments)
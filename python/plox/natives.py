@@ -0,0 +1,260 @@
+from __future__ import annotations
+import inspect
+import sys
+import time
+from typing import TYPE_CHECKING, Any, Callable, Final, Optional
+
+from .callable import LoxCallable
+from .containers import LoxList, LoxMap, dict_key
+from .errors import LoxRuntimeError
+from .rope import Rope, flatten
+
+if TYPE_CHECKING:
+    from .interpreter import Interpreter
+    from .tokens import Token
+
+
+class NativeError(Exception):
+    # Raised by a native to fail the Lox call; it becomes a runtime error at the call site.
+    pass
+
+
+class LoxNative(LoxCallable):
+    # A host function callable from Lox. Every engine checks for natives before anything else
+    # and calls them through call_at, which checks the argument count against the arity worked
+    # out once at registration and passes the arguments straight on: unpacked, or as the list
+    # itself for a batch native, which takes however many arguments it accepts in one parameter.
+
+    __slots__ = ("name", "function", "min_arity", "max_arity", "batch")
+
+    def __init__(self, name: str, function: Callable[..., Any], min_arity: int, max_arity: int, batch: bool):
+        self.name: Final = name
+        self.function: Final = function
+        self.min_arity: Final = min_arity
+        self.max_arity: Final = max_arity
+        self.batch: Final = batch
+
+    def arity(self) -> int:
+        return self.min_arity
+
+    def call(self, interpreter: Optional[Interpreter], arguments: list[Any]) -> Any:
+        return self.function(arguments) if self.batch else self.function(*arguments)
+
+    def call_at(self, paren: Token, arguments: list[Any]) -> Any:
+        if not self.min_arity <= len(arguments) <= self.max_arity:
+            raise LoxRuntimeError(paren, self.arity_error(len(arguments)))
+
+        try:
+            return self.function(arguments) if self.batch else self.function(*arguments)
+        except NativeError as e:
+            raise LoxRuntimeError(paren, str(e)) from None
+
+    def arity_error(self, count: int) -> str:
+        if self.min_arity == self.max_arity:
+            return f"Expected {self.min_arity} arguments but got {count}."
+
+        if self.max_arity == sys.maxsize:
+            return f"Expected at least {self.min_arity} arguments but got {count}."
+
+        return f"Expected {self.min_arity} to {self.max_arity} arguments but got {count}."
+
+    def __str__(self):
+        return "<native fn>"
+
+
+NATIVES: Final[dict[str, LoxNative]] = {}
+
+
+def native(function: Optional[Callable[..., Any]] = None, *, name: Optional[str] = None,
+           arity: Optional[int | tuple[int, Optional[int]]] = None, batch: bool = False) -> Any:
+    # Registers a function as the global native of the same name, or of the name given. Its arity
+    # comes from its parameters: those with defaults are optional and *args takes any number. A
+    # batch native takes a single list of arguments, so its arity is given instead, as a count
+    # or as the least and most, with None for no limit.
+    def register(function: Callable[..., Any]) -> Callable[..., Any]:
+        min_arity, max_arity = _arity(function) if arity is None else _bounds(arity)
+        NATIVES[name or function.__name__] = LoxNative(name or function.__name__, function, min_arity, max_arity, batch)
+        return function
+
+    if batch and arity is None:
+        raise TypeError("a batch native needs its arity")
+
+    return register if function is None else register(function)
+
+
+def _arity(function: Callable[..., Any]) -> tuple[int, int]:
+    min_arity: int = 0
+    max_arity: int = 0
+    for parameter in inspect.signature(function).parameters.values():
+        if parameter.kind == parameter.VAR_POSITIONAL:
+            max_arity = sys.maxsize
+        elif parameter.kind in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD):
+            min_arity += parameter.default is parameter.empty
+            max_arity += 1
+
+    return min_arity, max_arity
+
+
+def _bounds(arity: int | tuple[int, Optional[int]]) -> tuple[int, int]:
+    if type(arity) is int:
+        return arity, arity
+
+    least, most = arity
+    return least, sys.maxsize if most is None else most
+
+
+@native
+def clock() -> float:
+    return time.time()
+
+
+@native(name="list", arity=(0, None), batch=True)
+def make_list(arguments: list[Any]) -> LoxList:
+    # every engine builds a fresh argument list per call, so the list can keep it
+    return LoxList(arguments)
+
+
+@native
+def push(items: Any, value: Any) -> None:
+    _list(items).items.append(value)
+
+
+@native
+def pop(items: Any) -> Any:
+    values: list[Any] = _list(items).items
+    if not values:
+        raise NativeError("Can't pop from an empty list.")
+
+    return values.pop()
+
+
+@native
+def get(collection: Any, key: Any) -> Any:
+    if type(collection) is LoxMap:
+        try:
+            return collection.entries[_key(key)]
+        except KeyError:
+            raise NativeError("Undefined key.") from None
+
+    if type(collection) is not LoxList:
+        raise NativeError("Operand must be a list or a map.")
+
+    return collection.items[_index(key, len(collection.items) - 1)]
+
+
+@native(name="set")
+def set_item(collection: Any, key: Any, value: Any) -> Any:
+    if type(collection) is LoxMap:
+        collection.entries[_key(key)] = value
+    elif type(collection) is LoxList:
+        collection.items[_index(key, len(collection.items) - 1)] = value
+    else:
+        raise NativeError("Operand must be a list or a map.")
+
+    return value
+
+
+@native
+def length(items: Any) -> float:
+    return float(len(_list(items).items))
+
+
+@native(name="slice")
+def slice_list(items: Any, start: Any, end: Any = None) -> LoxList:
+    values: list[Any] = _list(items).items
+    last: int = len(values) if end is None else _index(end, len(values))
+    return LoxList(values[_index(start, last):last])
+
+
+@native
+def extend(items: Any, other: Any) -> None:
+    _list(items).items.extend(_list(other).items)
+
+
+@native
+def sort(items: Any) -> None:
+    values: list[Any] = _list(items).items
+    if not all(type(value) is float for value in values):
+        if not all(type(value) is str or type(value) is Rope for value in values):
+            raise NativeError("Can only sort a list of numbers or a list of strings.")
+
+        values[:] = [flatten(value) for value in values]
+
+    values.sort()
+
+
+@native
+def join(items: Any, separator: Any) -> str:
+    values: list[Any] = _list(items).items
+    if (type(separator) is not str and type(separator) is not Rope
+            or not all(type(value) is str or type(value) is Rope for value in values)):
+        raise NativeError("Can only join a list of strings with a string.")
+
+    return flatten(separator).join([flatten(value) for value in values])
+
+
+@native(name="map")
+def make_map() -> LoxMap:
+    return LoxMap()
+
+
+@native
+def has(entries: Any, key: Any) -> bool:
+    return _key(key) in _map(entries).entries
+
+
+@native
+def delete(entries: Any, key: Any) -> bool:
+    # whether there was an entry to delete
+    return _map(entries).entries.pop(_key(key), _missing) is not _missing
+
+
+@native
+def keys(entries: Any) -> LoxList:
+    return LoxList(_map(entries).keys())
+
+
+@native
+def size(entries: Any) -> float:
+    return float(len(_map(entries).entries))
+
+
+@native
+def merge(entries: Any, other: Any) -> None:
+    _map(entries).entries.update(_map(other).entries)
+
+
+_missing: Final = object()
+
+
+def _list(value: Any) -> LoxList:
+    if type(value) is not LoxList:
+        raise NativeError("Operand must be a list.")
+
+    return value
+
+
+def _index(index: Any, last: int) -> int:
+    # an index from 0 to last inclusive, given as a whole number
+    if type(index) is not float or not index.is_integer():
+        raise NativeError("Index must be a whole number.")
+
+    if not 0 <= index <= last:
+        raise NativeError("Index out of range.")
+
+    return int(index)
+
+
+def _map(value: Any) -> LoxMap:
+    if type(value) is not LoxMap:
+        raise NativeError("Operand must be a map.")
+
+    return value
+
+
+def _key(key: Any) -> Any:
+    key = flatten(key)
+    if key is not None and type(key) not in (str, float, bool):
+        raise NativeError("Map keys must be strings, numbers, booleans or nil.")
+
+    return dict_key(key)
@@ -0,0 +1,365 @@
+from __future__ import annotations
+import math
+from typing import TYPE_CHECKING, Any, Collection, Final, Optional
+
+from .expr import Binary, Grouping, Literal, Logical, Unary
+from .stmt import Block
+from .tokens import TokenType
+from .visitor import ExprVisitor, StmtVisitor
+
+if TYPE_CHECKING:
+    from .expr import Assign, Call, Expr, Get, Set, Super, This, Variable
+    from .stmt import Stmt, Class, Expression, Function, If, Print, Return, Var, While
+
+
+class Transformer(ExprVisitor, StmtVisitor):
+    # Rewrites a resolved tree in place. Each visit method returns the node that replaces the one
+    # visited; a statement visit may return None to remove the statement. The nodes the resolver
+    # recorded (variables, assignments, 'this' and 'super') are always kept, never rebuilt.
+
+    def transform(self, statements: list[Stmt]) -> list[Stmt]:
+        return self._statements(statements)
+
+    def visit_assign_expr(self, expr: Assign) -> Expr:
+        expr.value = self._expr(expr.value)
+        return expr
+
+    def visit_binary_expr(self, expr: Binary) -> Expr:
+        expr.left = self._expr(expr.left)
+        expr.right = self._expr(expr.right)
+        return expr
+
+    def visit_call_expr(self, expr: Call) -> Expr:
+        expr.callee = self._expr(expr.callee)
+        expr.arguments = [self._expr(argument) for argument in expr.arguments]
+        return expr
+
+    def visit_get_expr(self, expr: Get) -> Expr:
+        expr.obj = self._expr(expr.obj)
+        return expr
+
+    def visit_grouping_expr(self, expr: Grouping) -> Expr:
+        expr.expression = self._expr(expr.expression)
+        return expr
+
+    def visit_literal_expr(self, expr: Literal) -> Expr:
+        return expr
+
+    def visit_logical_expr(self, expr: Logical) -> Expr:
+        expr.left = self._expr(expr.left)
+        expr.right = self._expr(expr.right)
+        return expr
+
+    def visit_set_expr(self, expr: Set) -> Expr:
+        expr.obj = self._expr(expr.obj)
+        expr.value = self._expr(expr.value)
+        return expr
+
+    def visit_super_expr(self, expr: Super) -> Expr:
+        return expr
+
+    def visit_this_expr(self, expr: This) -> Expr:
+        return expr
+
+    def visit_unary_expr(self, expr: Unary) -> Expr:
+        expr.right = self._expr(expr.right)
+        return expr
+
+    def visit_variable_expr(self, expr: Variable) -> Expr:
+        return expr
+
+    def visit_block_stmt(self, stmt: Block) -> Optional[Stmt]:
+        stmt.statements = self._statements(stmt.statements)
+        return stmt
+
+    def visit_class_stmt(self, stmt: Class) -> Optional[Stmt]:
+        for method in stmt.methods:
+            method.body = self._statements(method.body)
+        return stmt
+
+    def visit_expression_stmt(self, stmt: Expression) -> Optional[Stmt]:
+        stmt.expression = self._expr(stmt.expression)
+        return stmt
+
+    def visit_function_stmt(self, stmt: Function) -> Optional[Stmt]:
+        stmt.body = self._statements(stmt.body)
+        return stmt
+
+    def visit_if_stmt(self, stmt: If) -> Optional[Stmt]:
+        stmt.condition = self._expr(stmt.condition)
+        stmt.then_branch = self._branch(stmt.then_branch)
+        if stmt.else_branch is not None:
+            stmt.else_branch = self._branch(stmt.else_branch)
+        return stmt
+
+    def visit_print_stmt(self, stmt: Print) -> Optional[Stmt]:
+        stmt.expression = self._expr(stmt.expression)
+        return stmt
+
+    def visit_return_stmt(self, stmt: Return) -> Optional[Stmt]:
+        if stmt.value is not None:
+            stmt.value = self._expr(stmt.value)
+        return stmt
+
+    def visit_var_stmt(self, stmt: Var) -> Optional[Stmt]:
+        if stmt.initializer is not None:
+            stmt.initializer = self._expr(stmt.initializer)
+        return stmt
+
+    def visit_while_stmt(self, stmt: While) -> Optional[Stmt]:
+        if stmt.condition is not None:
+            stmt.condition = self._expr(stmt.condition)
+        stmt.body = self._branch(stmt.body)
+        return stmt
+
+    def _expr(self, expr: Expr) -> Expr:
+        return expr.accept(self)
+
+    def _statements(self, statements: list[Stmt]) -> list[Stmt]:
+        transformed: list[Stmt] = []
+        for statement in statements:
+            result: Optional[Stmt] = statement.accept(self)
+            if result is not None:
+                transformed.append(result)
+
+        return transformed
+
+    def _branch(self, stmt: Stmt) -> Stmt:
+        # a branch or loop body must stay a statement, so a removed one becomes an empty block
+        result: Optional[Stmt] = stmt.accept(self)
+        return Block([]) if result is None else result
+
+
+class GroupingRemoval(Transformer):
+    def visit_grouping_expr(self, expr: Grouping) -> Expr:
+        return self._expr(expr.expression)
+
+
+class ConstantFolding(Transformer):
+    def visit_binary_expr(self, expr: Binary) -> Expr:
+        super().visit_binary_expr(expr)
+
+        left: Expr = _unwrap(expr.left)
+        right: Expr = _unwrap(expr.right)
+        if type(left) is not Literal or type(right) is not Literal:
+            return expr
+
+        a: Any = left.value
+        b: Any = right.value
+
+        match expr.operator.type:
+            case TokenType.BANG_EQUAL:
+                return Literal(not _is_equal(a, b))
+            case TokenType.EQUAL_EQUAL:
+                return Literal(_is_equal(a, b))
+            case TokenType.PLUS if type(a) is str and type(b) is str:
+                return Literal(a + b)
+
+        # anything else only folds on numbers; type errors are left for the runtime to report
+        if type(a) is not float or type(b) is not float:
+            return expr
+
+        value: Any
+        match expr.operator.type:
+            case TokenType.GREATER:
+                value = a > b
+            case TokenType.GREATER_EQUAL:
+                value = a >= b
+            case TokenType.LESS:
+                value = a < b
+            case TokenType.LESS_EQUAL:
+                value = a <= b
+            case TokenType.MINUS:
+                value = a - b
+            case TokenType.PLUS:
+                value = a + b
+            case TokenType.SLASH:
+                if b == 0.0:
+                    return expr
+                value = a / b
+            case TokenType.STAR:
+                value = a * b
+            case _:
+                return expr
+
+        if type(value) is float and not math.isfinite(value):
+            return expr
+
+        return Literal(value)
+
+    def visit_grouping_expr(self, expr: Grouping) -> Expr:
+        super().visit_grouping_expr(expr)
+
+        if type(expr.expression) is Literal:
+            return expr.expression
+
+        return expr
+
+    def visit_logical_expr(self, expr: Logical) -> Expr:
+        super().visit_logical_expr(expr)
+
+        left: Expr = _unwrap(expr.left)
+        if type(left) is not Literal:
+            return expr
+
+        if expr.operator.type == TokenType.OR:
+            return left if _is_truthy(left.value) else expr.right
+
+        return expr.right if _is_truthy(left.value) else left
+
+    def visit_unary_expr(self, expr: Unary) -> Expr:
+        super().visit_unary_expr(expr)
+
+        right: Expr = _unwrap(expr.right)
+        if type(right) is not Literal:
+            return expr
+
+        if expr.operator.type == TokenType.BANG:
+            return Literal(not _is_truthy(right.value))
+
+        if type(right.value) is float:
+            return Literal(-right.value)
+
+        return expr
+
+
+class LoopSimplification(Transformer):
+    # for-loops without a condition are desugared into 'while (true)'; a missing condition tells
+    # the engines to loop without evaluating anything, and a loop that never runs is dropped
+    def visit_while_stmt(self, stmt: While) -> Optional[Stmt]:
+        super().visit_while_stmt(stmt)
+
+        condition: Optional[Expr] = None if stmt.condition is None else _unwrap(stmt.condition)
+        if type(condition) is not Literal:
+            return stmt
+
+        if not _is_truthy(condition.value):
+            return None
+
+        stmt.condition = None
+        return stmt
+
+
+class BranchPruning(Transformer):
+    def visit_if_stmt(self, stmt: If) -> Optional[Stmt]:
+        super().visit_if_stmt(stmt)
+
+        condition: Expr = _unwrap(stmt.condition)
+        if type(condition) is not Literal:
+            return stmt
+
+        if _is_truthy(condition.value):
+            return stmt.then_branch
+
+        return stmt.else_branch
+
+
+class NodeCounter(ExprVisitor, StmtVisitor):
+    def count(self, statements: list[Stmt]) -> int:
+        return sum(self._count(statement) for statement in statements)
+
+    def visit_assign_expr(self, expr: Assign) -> int:
+        return 1 + self._count(expr.value)
+
+    def visit_binary_expr(self, expr: Binary) -> int:
+        return 1 + self._count(expr.left) + self._count(expr.right)
+
+    def visit_call_expr(self, expr: Call) -> int:
+        return 1 + self._count(expr.callee) + sum(self._count(argument) for argument in expr.arguments)
+
+    def visit_get_expr(self, expr: Get) -> int:
+        return 1 + self._count(expr.obj)
+
+    def visit_grouping_expr(self, expr: Grouping) -> int:
+        return 1 + self._count(expr.expression)
+
+    def visit_literal_expr(self, expr: Literal) -> int:
+        return 1
+
+    def visit_logical_expr(self, expr: Logical) -> int:
+        return 1 + self._count(expr.left) + self._count(expr.right)
+
+    def visit_set_expr(self, expr: Set) -> int:
+        return 1 + self._count(expr.obj) + self._count(expr.value)
+
+    def visit_super_expr(self, expr: Super) -> int:
+        return 1
+
+    def visit_this_expr(self, expr: This) -> int:
+        return 1
+
+    def visit_unary_expr(self, expr: Unary) -> int:
+        return 1 + self._count(expr.right)
+
+    def visit_variable_expr(self, expr: Variable) -> int:
+        return 1
+
+    def visit_block_stmt(self, stmt: Block) -> int:
+        return 1 + self.count(stmt.statements)
+
+    def visit_class_stmt(self, stmt: Class) -> int:
+        superclass: int = 0 if stmt.superclass is None else 1
+        return 1 + superclass + sum(self._count(method) for method in stmt.methods)
+
+    def visit_expression_stmt(self, stmt: Expression) -> int:
+        return 1 + self._count(stmt.expression)
+
+    def visit_function_stmt(self, stmt: Function) -> int:
+        return 1 + self.count(stmt.body)
+
+    def visit_if_stmt(self, stmt: If) -> int:
+        return 1 + self._count(stmt.condition) + self._count(stmt.then_branch) + self._count(stmt.else_branch)
+
+    def visit_print_stmt(self, stmt: Print) -> int:
+        return 1 + self._count(stmt.expression)
+
+    def visit_return_stmt(self, stmt: Return) -> int:
+        return 1 + self._count(stmt.value)
+
+    def visit_var_stmt(self, stmt: Var) -> int:
+        return 1 + self._count(stmt.initializer)
+
+    def visit_while_stmt(self, stmt: While) -> int:
+        return 1 + self._count(stmt.condition) + self._count(stmt.body)
+
+    def _count(self, node: Optional[Expr | Stmt]) -> int:
+        return 0 if node is None else node.accept(self)
+
+
+class Optimizer:
+    passes: Final = {
+        "groupings": GroupingRemoval,
+        "fold": ConstantFolding,
+        "loops": LoopSimplification,
+        "branches": BranchPruning,
+    }
+
+    def __init__(self, enabled: Collection[str] = passes.keys()):
+        self._enabled: Final = [name for name in Optimizer.passes.keys() if name in enabled]
+        self.removed: Final[dict[str, int]] = {name: 0 for name in self._enabled}
+
+    def optimize(self, statements: list[Stmt]) -> list[Stmt]:
+        counter = NodeCounter()
+
+        for name in self._enabled:
+            before: int = counter.count(statements)
+            statements = Optimizer.passes[name]().transform(statements)
+            self.removed[name] += before - counter.count(statements)
+
+        return statements
+
+
+def _unwrap(expr: Expr) -> Expr:
+    # constant operands are still recognised when the grouping pass is switched off
+    while type(expr) is Grouping:
+        expr = expr.expression
+
+    return expr
+
+
+def _is_truthy(value: Any) -> bool:
+    return value is not None and value is not False
+
+
+def _is_equal(a: Any, b: Any) -> bool:
+    return type(a) is type(b) and a == b
@@ -1,30 +1,47 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Final, Optional
+from enum import IntEnum, auto
+from typing import TYPE_CHECKING, Callable, Final, Iterator, Optional
 
 from .errors import LoxErrors, ParseError
 from .expr import Assign, Binary, Call, Get, Grouping, Literal, Logical, Set, Super, This, Unary, Variable
 from .stmt import Block, Class, Expression, Function, If, Print, Return, Var, While
-from .tokens import TokenType
+from .tokens import TokenBuffer, TokenStream, TokenType
 
 if TYPE_CHECKING:
     from .expr import Expr
+    from .resolver import Resolver
     from .stmt import Stmt
     from .tokens import Token
 
 
 class Parser:
-    def __init__(self, tokens: list[Token]):
+    def __init__(self, tokens: list[Token] | TokenStream | TokenBuffer, lazy: bool = False):
         self._tokens: Final = tokens
         self._current = 0
+        self._lazy: Final = lazy
+
+        # a token stream answers type checks without building the Token
+        self._type_of: Final[Callable[[int], TokenType]] = (
+            tokens.type_of if isinstance(tokens, TokenStream) else lambda index: tokens[index].type
+        )
 
     def parse(self) -> list[Stmt]:
-        statements: list[Stmt] = []
+        return list(self.declarations())
 
+    def declarations(self) -> Iterator[Optional[Stmt]]:
+        # a declaration that failed to parse comes out as None
         while not self._at_end():
-            statements.append(self._declaration())
+            yield self._declaration()
 
-        return statements
+            # a buffer can let go of the declaration's tokens, nothing reads back past it
+            if type(self._tokens) is TokenBuffer:
+                self._tokens.discard(self._current)
+
+    def parse_body(self, start: int) -> list[Stmt]:
+        # the block of statements from start up to its closing brace
+        self._current = start
+        return self._block()
 
     def _expression(self) -> Expr:
         return self._assignment()
@@ -143,6 +160,12 @@ class Parser:
         self._consume(TokenType.RIGHT_PAREN, "Expect ')' after parameters.")
         self._consume(TokenType.LEFT_BRACE, f"Expect '{{' before {kind} body.")
 
+        if self._lazy:
+            function = Function(name, parameters, [])
+            function.lazy = LazyBody(self, self._current)
+            self._skip_block()
+            return function
+
         body: list[Stmt] = self._block()
 
         return Function(name, parameters, body)
@@ -191,6 +214,20 @@ class Parser:
 
         return While(condition, body)
 
+    def _skip_block(self) -> None:
+        # steps past the closing brace matching an opening one just consumed
+        depth: int = 1
+        while depth != 0:
+            match self._type_of(self._current):
+                case TokenType.LEFT_BRACE:
+                    depth += 1
+                case TokenType.RIGHT_BRACE:
+                    depth -= 1
+                case TokenType.EOF:
+                    raise self._error(self._peek(), "Expect '}' after block.")
+
+            self._current += 1
+
     def _block(self) -> list[Stmt]:
         statements: list[Stmt] = []
 
@@ -346,9 +383,10 @@ class Parser:
 
         raise self._error(self._peek(), "Expect expression.")
 
-    def _consume(self, type: TokenType, message: str):
+    def _consume(self, type: TokenType, message: str) -> Token:
         if self._check(type):
-            return self._advance()
+            self._advance()
+            return self._previous()
 
         raise self._error(self._peek(), message)
 
@@ -361,17 +399,15 @@ class Parser:
         return False
 
     def _check(self, type: TokenType) -> bool:
-        if self._at_end():
-            return False
-        return self._peek().type == type
+        # never asked for EOF, so the end of the tokens needs no separate test
+        return self._type_of(self._current) == type
 
-    def _advance(self) -> Token:
+    def _advance(self) -> None:
         if not self._at_end():
             self._current += 1
-        return self._previous()
 
     def _at_end(self) -> bool:
-        return self._peek().type == TokenType.EOF
+        return self._type_of(self._current) == TokenType.EOF
 
     def _peek(self) -> Token:
         return self._tokens[self._current]
@@ -387,12 +423,177 @@ class Parser:
         self._advance()
 
         while not self._at_end():
-            if self._previous().type == TokenType.SEMICOLON:
+            if self._type_of(self._current - 1) == TokenType.SEMICOLON:
                 return
 
-            match self._peek().type:
+            match self._type_of(self._current):
                 case TokenType.CLASS | TokenType.FUN | TokenType.VAR | TokenType.FOR\
                      | TokenType.IF | TokenType.WHILE | TokenType.PRINT | TokenType.RETURN:
                     return
 
             self._advance()
+
+
+class LazyBody:
+    # The tokens of a function body that was only brace-matched, parsed and resolved the first
+    # time the function is called. The resolver leaves a resolver behind in the state it was in
+    # at the body, to carry on with it then.
+
+    __slots__ = ("_parser", "_start", "resolver")
+
+    def __init__(self, parser: Parser, start: int):
+        self._parser: Final = parser
+        self._start: Final = start
+        self.resolver: Optional[Resolver] = None
+
+    def force(self, function: Function) -> None:
+        statements: list[Stmt] = self._parser.parse_body(self._start)
+
+        if not LoxErrors.had_error:
+            self.resolver.resolve_statements(statements)
+
+        # reported like any other syntax error, and ends the program like one
+        if LoxErrors.had_error:
+            raise ParseError()
+
+        function.body = statements
+        function.lazy = None
+
+
+class _Precedence(IntEnum):
+    OR = auto()
+    AND = auto()
+    EQUALITY = auto()
+    COMPARISON = auto()
+    TERM = auto()
+    FACTOR = auto()
+    UNARY = auto()
+    CALL = auto()
+
+
+class PrattParser(Parser):
+    # Parses expressions from a table of prefix and infix rules per token type, like clox's
+    # compiler, rather than with a method per precedence level: a primary expression takes two
+    # calls instead of ten. Statements, the tree built and the errors reported are the Parser's.
+
+    def _assignment(self) -> Expr:
+        expr: Expr = self._parse_precedence(_Precedence.OR)
+
+        if self._type_of(self._current) == TokenType.EQUAL:
+            self._current += 1
+            equals: Token = self._previous()
+            value: Expr = self._assignment()
+
+            if isinstance(expr, Variable):
+                return Assign(expr.name, value)
+            elif isinstance(expr, Get):
+                return Set(expr.obj, expr.name, value)
+
+            self._error(equals, "Invalid assignment target.")
+
+        return expr
+
+    _expression = _assignment
+
+    def _parse_precedence(self, precedence: int) -> Expr:
+        # parses an expression whose operators all bind at least as tightly as precedence
+        type_of: Callable[[int], TokenType] = self._type_of
+
+        prefix: Optional[Callable[[PrattParser], Expr]] = PrattParser.prefix_rules.get(type_of(self._current))
+        if prefix is None:
+            raise self._error(self._peek(), "Expect expression.")
+
+        # EOF has no rules, so these never step past the end of the tokens
+        self._current += 1
+        expr: Expr = prefix(self)
+
+        infix_rules: dict[TokenType, tuple[int, Callable[[PrattParser, Expr], Expr]]] = PrattParser.infix_rules
+        while True:
+            rule: Optional[tuple[int, Callable[[PrattParser, Expr], Expr]]] = infix_rules.get(type_of(self._current))
+            if rule is None or rule[0] < precedence:
+                return expr
+
+            self._current += 1
+            expr = rule[1](self, expr)
+
+    def _literal(self) -> Expr:
+        match self._type_of(self._current - 1):
+            case TokenType.FALSE:
+                return Literal(False)
+            case TokenType.TRUE:
+                return Literal(True)
+            case TokenType.NIL:
+                return Literal(None)
+
+        return Literal(self._previous().literal)
+
+    def _grouping(self) -> Expr:
+        expr: Expr = self._expression()
+        self._consume(TokenType.RIGHT_PAREN, "Expect ')' after expression.")
+        return Grouping(expr)
+
+    def _unary_prefix(self) -> Expr:
+        operator: Token = self._previous()
+        right: Expr = self._parse_precedence(_Precedence.UNARY)
+        return Unary(operator, right)
+
+    def _variable(self) -> Expr:
+        return Variable(self._previous())
+
+    def _this(self) -> Expr:
+        return This(self._previous())
+
+    def _super(self) -> Expr:
+        keyword: Token = self._previous()
+        self._consume(TokenType.DOT, "Expect '.' after 'super'.")
+        method: Token = self._consume(TokenType.IDENTIFIER, "Expect superclass method name.")
+        return Super(keyword, method)
+
+    def _binary(self, left: Expr) -> Expr:
+        # every binary operator is left associative: the right operand binds one level tighter
+        operator: Token = self._previous()
+        right: Expr = self._parse_precedence(PrattParser.infix_rules[operator.type][0] + 1)
+        return Binary(left, operator, right)
+
+    def _logical(self, left: Expr) -> Expr:
+        operator: Token = self._previous()
+        right: Expr = self._parse_precedence(PrattParser.infix_rules[operator.type][0] + 1)
+        return Logical(left, operator, right)
+
+    def _call_suffix(self, callee: Expr) -> Expr:
+        return self._finish_call(callee)
+
+    def _dot_suffix(self, obj: Expr) -> Expr:
+        name: Token = self._consume(TokenType.IDENTIFIER, "Expect property name after '.'.")
+        return Get(obj, name)
+
+    prefix_rules: Final[dict[TokenType, Callable[[PrattParser], Expr]]] = {
+        TokenType.FALSE: _literal,
+        TokenType.TRUE: _literal,
+        TokenType.NIL: _literal,
+        TokenType.NUMBER: _literal,
+        TokenType.STRING: _literal,
+        TokenType.LEFT_PAREN: _grouping,
+        TokenType.BANG: _unary_prefix,
+        TokenType.MINUS: _unary_prefix,
+        TokenType.IDENTIFIER: _variable,
+        TokenType.THIS: _this,
+        TokenType.SUPER: _super,
+    }
+
+    infix_rules: Final[dict[TokenType, tuple[int, Callable[[PrattParser, Expr], Expr]]]] = {
+        TokenType.OR: (_Precedence.OR, _logical),
+        TokenType.AND: (_Precedence.AND, _logical),
+        TokenType.BANG_EQUAL: (_Precedence.EQUALITY, _binary),
+        TokenType.EQUAL_EQUAL: (_Precedence.EQUALITY, _binary),
+        TokenType.GREATER: (_Precedence.COMPARISON, _binary),
+        TokenType.GREATER_EQUAL: (_Precedence.COMPARISON, _binary),
+        TokenType.LESS: (_Precedence.COMPARISON, _binary),
+        TokenType.LESS_EQUAL: (_Precedence.COMPARISON, _binary),
+        TokenType.MINUS: (_Precedence.TERM, _binary),
+        TokenType.PLUS: (_Precedence.TERM, _binary),
+        TokenType.SLASH: (_Precedence.FACTOR, _binary),
+        TokenType.STAR: (_Precedence.FACTOR, _binary),
+        TokenType.LEFT_PAREN: (_Precedence.CALL, _call_suffix),
+        TokenType.DOT: (_Precedence.CALL, _dot_suffix),
+    }
@@ -0,0 +1,134 @@
+from __future__ import annotations
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Final, Optional
+
+from .expr import Variable
+from .resolver import Resolver
+
+if TYPE_CHECKING:
+    from .expr import Assign, Call, Get, Set, Super, This
+    from .cache import Resolution
+    from .interpreter import Interpreter
+    from .stmt import Stmt, Class, Function, Print, Var
+    from .tokens import Token
+
+
+class _Candidate:
+    def __init__(self, declaration: Function):
+        self.declaration: Final = declaration
+        self.pure = True
+        self.globals: Final[set[str]] = set()
+
+
+class PurityResolver(Resolver):
+    # Resolves the program like the Resolver and also tells the interpreter which top-level
+    # functions are pure: their result depends only on their arguments, so calls can be memoised.
+    # A pure function reads and assigns only its own parameters and locals, calls only global
+    # functions that are themselves pure and never redefined, and has no other effects: no print,
+    # no property access, no global assignment and no nested function or class declarations.
+
+    def __init__(self, interpreter: Interpreter | Resolution):
+        super().__init__()
+        self._interpreter: Final = interpreter
+        self._candidates: Final[dict[str, _Candidate]] = {}
+        self._declarations: Final[Counter[str]] = Counter()
+        self._assigned: Final[set[str]] = set()
+        self._function: Optional[_Candidate] = None
+
+    def resolve_statements(self, statements: list[Stmt]) -> None:
+        super().resolve_statements(statements)
+
+        # only the program itself is resolved outside of any scope
+        if len(self._scopes) == 0:
+            self._mark_pure_functions()
+
+    def visit_class_stmt(self, stmt: Class) -> None:
+        self._declare_global(stmt.name)
+        self._impure()
+        super().visit_class_stmt(stmt)
+
+    def visit_function_stmt(self, stmt: Function) -> None:
+        if len(self._scopes) != 0:
+            self._impure()
+            super().visit_function_stmt(stmt)
+            return
+
+        self._declare_global(stmt.name)
+        self._function = _Candidate(stmt)
+        self._candidates[stmt.name.lexeme] = self._function
+        super().visit_function_stmt(stmt)
+        self._function = None
+
+    def visit_print_stmt(self, stmt: Print) -> None:
+        self._impure()
+        super().visit_print_stmt(stmt)
+
+    def visit_var_stmt(self, stmt: Var) -> None:
+        self._declare_global(stmt.name)
+        super().visit_var_stmt(stmt)
+
+    def visit_assign_expr(self, expr: Assign) -> Any:
+        super().visit_assign_expr(expr)
+
+        if not self._is_local(expr.name):
+            self._assigned.add(expr.name.lexeme)
+            self._impure()
+
+    def visit_call_expr(self, expr: Call) -> Any:
+        # calling anything other than a global function by name could run arbitrary code
+        if type(expr.callee) is not Variable or self._is_local(expr.callee.name):
+            self._impure()
+
+        super().visit_call_expr(expr)
+
+    def visit_get_expr(self, expr: Get) -> Any:
+        self._impure()
+        super().visit_get_expr(expr)
+
+    def visit_set_expr(self, expr: Set) -> Any:
+        self._impure()
+        super().visit_set_expr(expr)
+
+    def visit_super_expr(self, expr: Super) -> Any:
+        self._impure()
+        super().visit_super_expr(expr)
+
+    def visit_this_expr(self, expr: This) -> Any:
+        self._impure()
+        super().visit_this_expr(expr)
+
+    def visit_variable_expr(self, expr: Variable) -> Any:
+        super().visit_variable_expr(expr)
+
+        if self._function is not None and not self._is_local(expr.name):
+            self._function.globals.add(expr.name.lexeme)
+
+    def _impure(self) -> None:
+        if self._function is not None:
+            self._function.pure = False
+
+    def _is_local(self, name: Token) -> bool:
+        return any(name.lexeme in scope for scope in self._scopes)
+
+    def _declare_global(self, name: Token) -> None:
+        if len(self._scopes) == 0:
+            self._declarations[name.lexeme] += 1
+
+    def _mark_pure_functions(self) -> None:
+        pure: dict[str, _Candidate] = {
+            name: candidate for name, candidate in self._candidates.items()
+            if candidate.pure and self._declarations[name] == 1 and name not in self._assigned
+        }
+
+        # start from every candidate and drop those reading a global that isn't a pure function,
+        # until nothing changes; this keeps recursive and mutually recursive functions
+        changed: bool = True
+        while changed:
+            changed = False
+            for name, candidate in list(pure.items()):
+                if not candidate.globals <= pure.keys():
+                    del pure[name]
+                    changed = True
+
+        for candidate in pure.values():
+            self._interpreter.mark_pure(candidate.declaration)
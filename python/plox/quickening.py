@@ -0,0 +1,107 @@
+from __future__ import annotations
+import operator
+from typing import TYPE_CHECKING, Any, Callable, ClassVar, Final
+
+from .expr import Binary
+from .rope import concat, concat_interned
+from .tokens import TokenType
+
+if TYPE_CHECKING:
+    from .visitor import ExprVisitor
+
+
+class QuickenedBinary(Binary):
+    # A Binary the interpreter has rewritten in place, by swapping its class, after seeing what
+    # its operands were. It stays valid while both operands keep the type it was specialised for.
+
+    __slots__ = ()
+
+    operand_type: ClassVar[type]
+    operation: ClassVar[Callable[[Any, Any], Any]]
+
+    def accept(self, visitor: ExprVisitor) -> Any:
+        return visitor.visit_quickened_binary_expr(self)
+
+
+class GenericBinary(Binary):
+    # A quickened Binary whose guard failed; it is evaluated generically and never specialised again.
+
+    __slots__ = ()
+
+
+class NumberAdd(QuickenedBinary):
+    __slots__ = ()
+    operand_type = float
+    operation = operator.add
+
+
+class StringConcat(QuickenedBinary):
+    __slots__ = ()
+    operand_type = str
+    operation = staticmethod(concat)
+
+
+class InternedStringConcat(QuickenedBinary):
+    __slots__ = ()
+    operand_type = str
+    operation = staticmethod(concat_interned)
+
+
+class NumberSubtract(QuickenedBinary):
+    __slots__ = ()
+    operand_type = float
+    operation = operator.sub
+
+
+class NumberMultiply(QuickenedBinary):
+    __slots__ = ()
+    operand_type = float
+    operation = operator.mul
+
+
+class NumberDivide(QuickenedBinary):
+    __slots__ = ()
+    operand_type = float
+    operation = operator.truediv
+
+
+class NumberGreater(QuickenedBinary):
+    __slots__ = ()
+    operand_type = float
+    operation = operator.gt
+
+
+class NumberGreaterEqual(QuickenedBinary):
+    __slots__ = ()
+    operand_type = float
+    operation = operator.ge
+
+
+class NumberLess(QuickenedBinary):
+    __slots__ = ()
+    operand_type = float
+    operation = operator.lt
+
+
+class NumberLessEqual(QuickenedBinary):
+    __slots__ = ()
+    operand_type = float
+    operation = operator.le
+
+
+SPECIALIZATIONS: Final[dict[tuple[TokenType, type], type[QuickenedBinary]]] = {
+    (TokenType.PLUS, float): NumberAdd,
+    (TokenType.PLUS, str): StringConcat,
+    (TokenType.MINUS, float): NumberSubtract,
+    (TokenType.STAR, float): NumberMultiply,
+    (TokenType.SLASH, float): NumberDivide,
+    (TokenType.GREATER, float): NumberGreater,
+    (TokenType.GREATER_EQUAL, float): NumberGreaterEqual,
+    (TokenType.LESS, float): NumberLess,
+    (TokenType.LESS_EQUAL, float): NumberLessEqual,
+}
+
+INTERNING_SPECIALIZATIONS: Final[dict[tuple[TokenType, type], type[QuickenedBinary]]] = {
+    **SPECIALIZATIONS,
+    (TokenType.PLUS, str): InternedStringConcat,
+}
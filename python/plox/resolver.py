@@ -1,13 +1,12 @@
 from __future__ import annotations
 from enum import Enum, auto
-from typing import TYPE_CHECKING, Any, Final, Union
+from typing import TYPE_CHECKING, Any, Final, Optional, Union
 
 from .errors import LoxErrors
 from .visitor import ExprVisitor, StmtVisitor
 
 if TYPE_CHECKING:
-    from .expr import Assign, Binary, Call, Expr, Get, Grouping, Literal, Logical, Set, Super, This, Unary, Variable
-    from .interpreter import Interpreter
+    from .expr import Assign, Binary, Call, Expr, Get, Grouping, Literal, Logical, Resolvable, Set, Super, This, Unary, Variable
     from .stmt import Stmt, Block, Class, Expression, Function, If, Print, Return, Var, While
     from .tokens import Token
 
@@ -26,9 +25,10 @@ class _ClassType(Enum):
 
 
 class Resolver(ExprVisitor, StmtVisitor):
-    def __init__(self, interpreter: Interpreter):
-        self._interpreter: Final = interpreter
+    def __init__(self):
         self._scopes: Final[list[dict[str, bool]]] = []
+        # each scope's slot for every name in it, handed out in declaration order
+        self._slots: Final[list[dict[str, int]]] = []
         self._current_function = _FunctionType.NONE
         self._current_class = _ClassType.NONE
 
@@ -57,9 +57,7 @@ class Resolver(ExprVisitor, StmtVisitor):
 
             self._begin_scope()
             self._scopes[-1]["super"] = True
-
-        self._begin_scope()
-        self._scopes[-1]["this"] = True
+            self._slots[-1]["super"] = 0
 
         for method in stmt.methods:
             declaration = _FunctionType.METHOD
@@ -68,8 +66,6 @@ class Resolver(ExprVisitor, StmtVisitor):
 
             self._resolve_function(method, declaration)
 
-        self._end_scope()
-
         if stmt.superclass is not None:
             self._end_scope()
 
@@ -174,26 +170,48 @@ class Resolver(ExprVisitor, StmtVisitor):
         self._current_function = type
 
         self._begin_scope()
+        if type in (_FunctionType.METHOD, _FunctionType.INITIALIZER):
+            # the receiver takes the first slot of a method's frame
+            self._scopes[-1]["this"] = True
+            self._slots[-1]["this"] = 0
+
         for param in function.params:
             self._declare(param)
             self._define(param)
 
-        self.resolve_statements(function.body)
+        if function.lazy is not None:
+            function.lazy.resolver = self._fork()
+        else:
+            self.resolve_statements(function.body)
         self._end_scope()
 
         self._current_function = enclosing_function
 
-    def _resolve_local(self, expr: Expr, name: Token) -> None:
+    def _fork(self) -> Resolver:
+        # a resolver that goes on from here: the scopes are copied as they are, so names
+        # declared after this point stay out of sight, as they would be if it carried on now
+        resolver = Resolver()
+        resolver._scopes.extend(dict(scope) for scope in self._scopes)
+        resolver._slots.extend(dict(slots) for slots in self._slots)
+        resolver._current_function = self._current_function
+        resolver._current_class = self._current_class
+        return resolver
+
+    def _resolve_local(self, expr: Resolvable, name: Token) -> None:
         for i in range(len(self._scopes) - 1, -1, -1):
-            if name.lexeme in self._scopes[i].keys():
-                self._interpreter.resolve(expr, len(self._scopes) - 1 - i)
+            slot: Optional[int] = self._slots[i].get(name.lexeme)
+            if slot is not None:
+                expr.depth = len(self._scopes) - 1 - i
+                expr.slot = slot
                 return
 
     def _begin_scope(self) -> None:
         self._scopes.append({})
+        self._slots.append({})
 
     def _end_scope(self) -> None:
         self._scopes.pop()
+        self._slots.pop()
 
     def _declare(self, name: Token) -> None:
         if len(self._scopes) == 0:
@@ -201,6 +219,8 @@ class Resolver(ExprVisitor, StmtVisitor):
 
         if name.lexeme in self._scopes[-1].keys():
             LoxErrors.token_error(name, "Already a variable with this name in this scope.")
+        else:
+            self._slots[-1][name.lexeme] = len(self._slots[-1])
 
         self._scopes[-1][name.lexeme] = False
 
@@ -0,0 +1,82 @@
+from __future__ import annotations
+import sys
+from typing import Any, Final, Optional
+
+# concatenations shorter than this stay plain strings, which are cheaper to copy than to defer
+ROPE_LENGTH: Final = 256
+
+
+class Rope:
+    # A long string built by +, kept as the pieces it was built from until something needs its
+    # characters: printing, ==, hashing or a native. Appending to the newest rope on a list of
+    # pieces adds to that list in place, so s = s + piece in a loop takes linear time rather
+    # than copying s each time; an older rope copies the pieces it covers first, as the rest
+    # belong to a newer one.
+
+    __slots__ = ("_pieces", "_count", "_flat")
+
+    def __init__(self, pieces: list[str]):
+        self._pieces: list[str] = pieces
+        self._count: int = len(pieces)
+        self._flat: Optional[str] = None
+
+    def append(self, piece: str) -> Rope:
+        pieces: list[str] = self._pieces
+        if self._count != len(pieces):
+            pieces = [self._flat] if self._flat is not None else pieces[:self._count]
+
+        pieces.append(piece)
+        return Rope(pieces)
+
+    def flat(self) -> str:
+        if self._flat is None:
+            pieces: list[str] = self._pieces
+            if self._count == len(pieces):
+                self._flat = "".join(pieces)
+                # no newer rope shares the pieces, so they can go and later appends start from here
+                self._pieces = [self._flat]
+                self._count = 1
+            else:
+                self._flat = "".join(pieces[:self._count])
+
+        return self._flat
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is Rope or type(other) is str:
+            return self.flat() == flatten(other)
+
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.flat())
+
+    def __str__(self):
+        return self.flat()
+
+
+def concat(a: str | Rope, b: str | Rope) -> str | Rope:
+    if type(b) is Rope:
+        b = b.flat()
+
+    if type(a) is Rope:
+        return a.append(b)
+
+    if len(a) + len(b) < ROPE_LENGTH:
+        return a + b
+
+    return Rope([a, b])
+
+
+def concat_interned(a: str | Rope, b: str | Rope) -> str | Rope:
+    # like clox's string table, but only for short strings: a rope is never interned
+    result: str | Rope = concat(a, b)
+    return sys.intern(result) if type(result) is str else result
+
+
+def flatten(value: Any) -> Any:
+    return value.flat() if type(value) is Rope else value
+
+
+def strings_equal(a: Any, b: Any) -> bool:
+    # == for a rope and a string, which differ in type but not as Lox values
+    return (type(a) is Rope or type(b) is Rope) and flatten(a) == flatten(b)
@@ -1,7 +1,9 @@
-from typing import Any
+import re
+import sys
+from typing import Any, Final, Iterator, TextIO
 
 from .errors import LoxErrors
-from .tokens import Token, TokenType
+from .tokens import Token, TokenStream, TokenType
 
 
 class Scanner:
@@ -36,7 +38,8 @@ class Scanner:
             self.start = self.current
             self.scan_token()
 
-        self.tokens.append(Token(TokenType.EOF, "", None, self.line))
+        self.start = self.current
+        self.add_token(TokenType.EOF)
         return self.tokens
 
     def at_end(self) -> bool:
@@ -78,6 +81,8 @@ class Scanner:
 
     def add_token(self, type: TokenType, literal: Any = None) -> None:
         text: str = self.source[self.start:self.current]
+        if type == TokenType.IDENTIFIER:
+            text = sys.intern(text)
         self.tokens.append(Token(type, text, literal, self.line))
 
     def advance(self) -> str:
@@ -128,7 +133,7 @@ class Scanner:
         self.advance()
 
         # trim surrounding quotes
-        value: str = self.source[self.start + 1:self.current - 1]
+        value: str = sys.intern(self.source[self.start + 1:self.current - 1])
         self.add_token(TokenType.STRING, value)
 
     def number(self) -> None:
@@ -153,3 +158,130 @@ class Scanner:
             type = TokenType.IDENTIFIER
 
         self.add_token(type)
+
+
+class StreamScanner(Scanner):
+    # Scans into a TokenStream, recording where each token is instead of slicing it out.
+
+    def __init__(self, source: str):
+        super().__init__(source)
+        self.tokens: TokenStream = TokenStream(source)
+
+    def add_token(self, type: TokenType, literal: Any = None) -> None:
+        self.tokens.append(type, self.start, self.current, self.line)
+
+
+class RegexScanner(Scanner):
+    # Tokenises with one compiled pattern instead of a method call per character. Every character
+    # is matched by some alternative, the last one catching anything unexpected, so the tokens,
+    # lines and errors come out exactly as the Scanner's do.
+
+    pattern: Final = re.compile(r"""
+        (?P<space>[ \t\r\n]+)
+      | (?P<identifier>[A-Za-z_][A-Za-z_0-9]*)
+      | (?P<number>[0-9]+(?:\.[0-9]+)?)
+      | (?P<comment>//[^\n]*)
+      | (?P<operator>[!=<>]=?|[(){},.\-+;*/])
+      | (?P<string>"[^"]*")
+      | (?P<unterminated>"[^"]*)
+      | (?P<unexpected>.)
+    """, re.VERBOSE)
+
+    operators: Final = {
+        "(": TokenType.LEFT_PAREN,
+        ")": TokenType.RIGHT_PAREN,
+        "{": TokenType.LEFT_BRACE,
+        "}": TokenType.RIGHT_BRACE,
+        ",": TokenType.COMMA,
+        ".": TokenType.DOT,
+        "-": TokenType.MINUS,
+        "+": TokenType.PLUS,
+        ";": TokenType.SEMICOLON,
+        "*": TokenType.STAR,
+        "/": TokenType.SLASH,
+        "!": TokenType.BANG,
+        "!=": TokenType.BANG_EQUAL,
+        "=": TokenType.EQUAL,
+        "==": TokenType.EQUAL_EQUAL,
+        "<": TokenType.LESS,
+        "<=": TokenType.LESS_EQUAL,
+        ">": TokenType.GREATER,
+        ">=": TokenType.GREATER_EQUAL,
+    }
+
+    def scan_tokens(self) -> list[Token]:
+        self._scan(True)
+
+        self.start = self.current = len(self.source)
+        self.add_token(TokenType.EOF)
+        return self.tokens
+
+    def _scan(self, complete: bool) -> int:
+        # Scans the source and returns where it stopped. Unless the source is complete, a token
+        # ending at or next to its end is left unscanned, since it may read differently once more
+        # text follows: an identifier or comment could go on, and '12.' could become '12.5'.
+        keywords: dict[str, TokenType] = Scanner.keywords
+        operators: dict[str, TokenType] = RegexScanner.operators
+        last: int = len(self.source) - 1
+
+        for match in RegexScanner.pattern.finditer(self.source):
+            if not complete and match.end() >= last:
+                return match.start()
+
+            kind: str = match.lastgroup
+            text: str = match.group()
+            self.start, self.current = match.span()
+
+            if kind == "space":
+                self.line += text.count("\n")
+            elif kind == "identifier":
+                self.add_token(keywords.get(text, TokenType.IDENTIFIER))
+            elif kind == "operator":
+                self.add_token(operators[text])
+            elif kind == "number":
+                self.add_token(TokenType.NUMBER, float(text))
+            elif kind == "string":
+                self.line += text.count("\n")
+                self.add_token(TokenType.STRING, sys.intern(text[1:-1]))
+            elif kind == "unterminated":
+                self.line += text.count("\n")
+                LoxErrors.error(self.line, "Unterminated string.")
+            elif kind == "unexpected":
+                LoxErrors.error(self.line, "Unexpected character.")
+
+        return len(self.source)
+
+
+class RegexStreamScanner(RegexScanner, StreamScanner):
+    # The RegexScanner's tokenising feeding the StreamScanner's TokenStream.
+    pass
+
+
+CHUNK_SIZE: Final = 1 << 16
+
+
+class ChunkedScanner(RegexScanner):
+    # Reads its source from a text stream a chunk at a time and yields each token once it is
+    # complete, so only the unscanned end of the last chunk is held in memory.
+
+    def __init__(self, reader: TextIO, chunk_size: int = CHUNK_SIZE):
+        super().__init__("")
+        self._reader: Final = reader
+        self._chunk_size: Final = chunk_size
+
+    def scan_stream(self) -> Iterator[Token]:
+        rest: str = ""
+        while True:
+            chunk: str = self._reader.read(self._chunk_size)
+            self.source = rest + chunk
+            rest = self.source[self._scan(chunk == ""):]
+
+            yield from self.tokens
+            self.tokens.clear()
+
+            if chunk == "":
+                break
+
+        self.start = self.current = len(self.source)
+        self.add_token(TokenType.EOF)
+        yield from self.tokens
@@ -0,0 +1,105 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Final, Optional
+
+from .errors import LoxRuntimeError
+
+if TYPE_CHECKING:
+    from .callable import LoxClass, LoxInstance
+    from .tokens import Token
+
+POLYMORPHIC_LIMIT: Final = 4
+
+
+class Shape:
+    # Maps field names to slots in an instance's field list. Instances of a class that add the
+    # same fields in the same order end up sharing one shape, reached through the transitions.
+
+    __slots__ = ("klass", "slots", "_transitions")
+
+    def __init__(self, klass: LoxClass, slots: dict[str, int]):
+        self.klass: Final = klass
+        self.slots: Final = slots
+        self._transitions: Final[dict[str, Shape]] = {}
+
+    def with_field(self, name: str) -> Shape:
+        shape: Optional[Shape] = self._transitions.get(name)
+        if shape is None:
+            shape = Shape(self.klass, {**self.slots, name: len(self.slots)})
+            self._transitions[name] = shape
+
+        return shape
+
+
+class InlineCache:
+    # Remembers what a property access resolved to for the shapes it has seen. A Get caches
+    # either the field's slot or the method to bind; a Set caches either the slot to overwrite
+    # or the shape to move to when it adds the field. The first shape is checked by identity,
+    # up to POLYMORPHIC_LIMIT more go in a dict, and anything after that isn't cached at all.
+
+    __slots__ = ("_shape", "_entry", "_entries")
+
+    def __init__(self):
+        self._shape: Optional[Shape] = None
+        self._entry: Any = None
+        self._entries: Optional[dict[Shape, Any]] = None
+
+    def look_up(self, instance: LoxInstance, name: Token) -> Any:
+        shape: Shape = instance.shape
+        if shape is self._shape:
+            return self._entry
+
+        entry: Any = self._polymorphic_entry(shape)
+        if entry is None:
+            entry = shape.slots.get(name.lexeme)
+            if entry is None:
+                entry = shape.klass.find_method(name.lexeme)
+                if entry is None:
+                    raise LoxRuntimeError(name, f"Undefined property '{name.lexeme}'.")
+
+            self._store(shape, entry)
+
+        return entry
+
+    def get(self, instance: LoxInstance, name: Token) -> Any:
+        entry: Any = self.look_up(instance, name)
+        if type(entry) is int:
+            return instance.fields[entry]
+
+        return entry.bind(instance)
+
+    def set(self, instance: LoxInstance, name: Token, value: Any) -> None:
+        shape: Shape = instance.shape
+        if shape is self._shape:
+            entry: Any = self._entry
+        else:
+            entry = self._polymorphic_entry(shape)
+            if entry is None:
+                entry = shape.slots.get(name.lexeme)
+                if entry is None:
+                    entry = shape.with_field(name.lexeme)
+
+                self._store(shape, entry)
+
+        if type(entry) is int:
+            instance.fields[entry] = value
+        else:
+            instance.shape = entry
+            instance.fields.append(value)
+
+    def _polymorphic_entry(self, shape: Shape) -> Any:
+        if self._entries is None:
+            return None
+
+        return self._entries.get(shape)
+
+    def _store(self, shape: Shape, entry: Any) -> None:
+        if self._shape is None:
+            self._shape = shape
+            self._entry = entry
+            return
+
+        if self._entries is None:
+            self._entries = {}
+
+        if len(self._entries) < POLYMORPHIC_LIMIT:
+            self._entries[shape] = entry
@@ -1,21 +1,27 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import TYPE_CHECKING, Any
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Optional
 
 if TYPE_CHECKING:
     from .expr import Expr, Variable
+    from .parser import LazyBody
     from .tokens import Token
     from .visitor import StmtVisitor
 
 
 class Stmt(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def accept(self, visitor: StmtVisitor) -> Any:
         pass
 
+    def __reduce__(self) -> tuple:
+        return type(self), tuple(getattr(self, name) for name in self.__match_args__)
+
 
-@dataclass
+@dataclass(eq=False, slots=True)
 class Block(Stmt):
     statements: list[Stmt]
 
@@ -23,7 +29,7 @@ class Block(Stmt):
         return visitor.visit_block_stmt(self)
 
 
-@dataclass
+@dataclass(eq=False, slots=True)
 class Class(Stmt):
     name: Token
     superclass: Variable
@@ -33,7 +39,7 @@ class Class(Stmt):
         return visitor.visit_class_stmt(self)
 
 
-@dataclass
+@dataclass(eq=False, slots=True)
 class Expression(Stmt):
     expression: Expr
 
@@ -41,17 +47,19 @@ class Expression(Stmt):
         return visitor.visit_expression_stmt(self)
 
 
-@dataclass
+@dataclass(eq=False, slots=True)
 class Function(Stmt):
     name: Token
     params: list[Token]
     body: list[Stmt]
+    # set instead of body by a lazy parser, until the function is first called
+    lazy: Optional[LazyBody] = field(default=None, init=False, repr=False, compare=False)
 
     def accept(self, visitor: StmtVisitor) -> Any:
         return visitor.visit_function_stmt(self)
 
 
-@dataclass
+@dataclass(eq=False, slots=True)
 class If(Stmt):
     condition: Expr
     then_branch: Stmt
@@ -61,7 +69,7 @@ class If(Stmt):
         return visitor.visit_if_stmt(self)
 
 
-@dataclass
+@dataclass(eq=False, slots=True)
 class Print(Stmt):
     expression: Expr
 
@@ -69,7 +77,7 @@ class Print(Stmt):
         return visitor.visit_print_stmt(self)
 
 
-@dataclass
+@dataclass(eq=False, slots=True)
 class Return(Stmt):
     keyword: Token
     value: Expr
@@ -78,7 +86,7 @@ class Return(Stmt):
         return visitor.visit_return_stmt(self)
 
 
-@dataclass
+@dataclass(eq=False, slots=True)
 class Var(Stmt):
     name: Token
     initializer: Expr
@@ -87,7 +95,7 @@ class Var(Stmt):
         return visitor.visit_var_stmt(self)
 
 
-@dataclass
+@dataclass(eq=False, slots=True)
 class While(Stmt):
     condition: Expr
     body: Stmt
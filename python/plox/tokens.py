@@ -1,5 +1,7 @@
+import sys
+from array import array
 from enum import Enum, auto
-from typing import Any
+from typing import Any, Final, Iterator
 
 
 class TokenType(Enum):
@@ -53,6 +55,8 @@ class TokenType(Enum):
 
 
 class Token:
+    __slots__ = ("type", "lexeme", "literal", "line")
+
     def __init__(self, type: TokenType, lexeme: str, literal: Any, line: int):
         self.type = type
         self.lexeme = lexeme
@@ -61,3 +65,75 @@ class Token:
 
     def __str__(self):
         return f"{self.type} {self.lexeme} {self.literal}"
+
+    def __reduce__(self) -> tuple:
+        return Token, (self.type, self.lexeme, self.literal, self.line)
+
+
+_TOKEN_TYPES: Final = list(TokenType)
+_TYPE_CODES: Final = {type: code for code, type in enumerate(_TOKEN_TYPES)}
+
+
+class TokenStream:
+    # The tokens of one source string kept in parallel arrays of type codes, offsets and lines.
+    # Nothing is sliced out of the source while scanning; a Token with its lexeme and literal is
+    # only built when the parser asks for one, which it does for the tokens that end up in the tree.
+    # Identifiers and string literals are interned, as the Scanner does for its tokens.
+
+    __slots__ = ("source", "_types", "_starts", "_ends", "_lines")
+
+    def __init__(self, source: str):
+        self.source: Final = source
+        self._types: Final = array("B")
+        self._starts: Final = array("I")
+        self._ends: Final = array("I")
+        self._lines: Final = array("I")
+
+    def append(self, type: TokenType, start: int, end: int, line: int) -> None:
+        self._types.append(_TYPE_CODES[type])
+        self._starts.append(start)
+        self._ends.append(end)
+        self._lines.append(line)
+
+    def type_of(self, index: int) -> TokenType:
+        return _TOKEN_TYPES[self._types[index]]
+
+    def __len__(self) -> int:
+        return len(self._types)
+
+    def __getitem__(self, index: int) -> Token:
+        type: TokenType = _TOKEN_TYPES[self._types[index]]
+        lexeme: str = self.source[self._starts[index]:self._ends[index]]
+
+        literal: Any = None
+        if type == TokenType.IDENTIFIER:
+            lexeme = sys.intern(lexeme)
+        elif type == TokenType.NUMBER:
+            literal = float(lexeme)
+        elif type == TokenType.STRING:
+            literal = sys.intern(lexeme[1:-1])
+
+        return Token(type, lexeme, literal, self._lines[index])
+
+
+class TokenBuffer:
+    # Tokens pulled from an iterator as the parser reaches them. Indexes stay those of the whole
+    # token sequence; tokens before a discarded index are dropped and can't be read again.
+
+    __slots__ = ("_tokens", "_buffer", "_offset")
+
+    def __init__(self, tokens: Iterator[Token]):
+        self._tokens: Final = tokens
+        self._buffer: Final[list[Token]] = []
+        self._offset = 0
+
+    def discard(self, index: int) -> None:
+        del self._buffer[:index - self._offset]
+        self._offset = index
+
+    def __getitem__(self, index: int) -> Token:
+        position: int = index - self._offset
+        while position >= len(self._buffer):
+            self._buffer.append(next(self._tokens))
+
+        return self._buffer[position]
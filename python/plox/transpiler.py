@@ -0,0 +1,707 @@
+from __future__ import annotations
+from functools import partial
+from types import CodeType, FrameType, TracebackType
+from typing import TYPE_CHECKING, Any, Callable, Final, Optional
+
+from .callable import LoxCallable, LoxClass, LoxInstance
+from .errors import LoxErrors, LoxRuntimeError
+from .expr import Assign, Get
+from .interpreter import Interpreter
+from .natives import LoxNative
+from .rope import Rope, strings_equal
+from .tokens import Token, TokenType
+from .visitor import ExprVisitor, StmtVisitor
+
+if TYPE_CHECKING:
+    from .expr import Binary, Call, Expr, Grouping, Literal, Logical, Resolvable, Set, Super, This, Unary, Variable
+    from .shape import InlineCache
+    from .stmt import Stmt, Block, Class, Expression, Function, If, Print, Return, Var, While
+
+_FILENAME: Final = "<lox>"
+
+
+class TranspiledFunction(LoxCallable):
+    __slots__ = ("name", "function", "param_count", "_is_initializer")
+
+    def __init__(self, name: str, function: Callable[..., Any], param_count: int, is_initializer: bool):
+        self.name: Final = name
+        self.function: Final = function
+        self.param_count: Final = param_count
+        self._is_initializer: Final = is_initializer
+
+    def bind(self, instance: LoxInstance) -> TranspiledFunction:
+        return TranspiledFunction(self.name, partial(self.function, instance), self.param_count, self._is_initializer)
+
+    def arity(self) -> int:
+        return self.param_count
+
+    def call(self, interpreter: Interpreter, arguments: list[Any]) -> Any:
+        return self.function(*arguments)
+
+    def invoke(self, interpreter: Interpreter, this: LoxInstance, arguments: list[Any]) -> Any:
+        return self.function(this, *arguments)
+
+    def __str__(self):
+        return f"<fn {self.name}>"
+
+
+class _Variable:
+    def __init__(self, pyname: str, function: Optional[_Function], in_loop: bool):
+        self.pyname: Final = pyname
+        self.function: Final = function
+        self.in_loop: Final = in_loop
+        self.captured = False
+
+    @property
+    def boxed(self) -> bool:
+        # Python closures capture a variable per function call, Lox captures it per declaration;
+        # the two only differ for captured variables declared inside a loop, which live in a box
+        return self.captured and self.in_loop
+
+
+class _Function:
+    def __init__(self, enclosing: Optional[_Function]):
+        self.enclosing: Final = enclosing
+        self.loop_depth = 0
+        self.free: Final[dict[_Variable, None]] = {}
+        self.assigned: Final[dict[_Variable, None]] = {}
+
+
+class _ScopeAnalyzer(ExprVisitor, StmtVisitor):
+    # Mirrors the resolver's scopes to give every local a unique Python name and to find out
+    # which locals are captured by inner functions, and from inside which loops.
+
+    def __init__(self):
+        self._scopes: Final[list[dict[str, _Variable]]] = []
+        self._function: Optional[_Function] = None
+        self._counter = 0
+
+        self.declarations: Final[dict[int, _Variable]] = {}
+        self.references: Final[dict[Expr, _Variable]] = {}
+        self.functions: Final[dict[int, _Function]] = {}
+
+    def analyze(self, statements: list[Stmt]) -> None:
+        self._function = _Function(None)
+        self._statements(statements)
+
+    def visit_assign_expr(self, expr: Assign) -> None:
+        self._analyze(expr.value)
+        variable: Optional[_Variable] = self._reference(expr, expr.name.lexeme)
+        if variable is not None and variable.function is not self._function:
+            self._function.assigned[variable] = None
+
+    def visit_binary_expr(self, expr: Binary) -> None:
+        self._analyze(expr.left)
+        self._analyze(expr.right)
+
+    def visit_call_expr(self, expr: Call) -> None:
+        self._analyze(expr.callee)
+        for argument in expr.arguments:
+            self._analyze(argument)
+
+    def visit_get_expr(self, expr: Get) -> None:
+        self._analyze(expr.obj)
+
+    def visit_grouping_expr(self, expr: Grouping) -> None:
+        self._analyze(expr.expression)
+
+    def visit_literal_expr(self, expr: Literal) -> None:
+        pass
+
+    def visit_logical_expr(self, expr: Logical) -> None:
+        self._analyze(expr.left)
+        self._analyze(expr.right)
+
+    def visit_set_expr(self, expr: Set) -> None:
+        self._analyze(expr.value)
+        self._analyze(expr.obj)
+
+    def visit_super_expr(self, expr: Super) -> None:
+        self._reference(expr, "super")
+
+    def visit_this_expr(self, expr: This) -> None:
+        pass
+
+    def visit_unary_expr(self, expr: Unary) -> None:
+        self._analyze(expr.right)
+
+    def visit_variable_expr(self, expr: Variable) -> None:
+        self._reference(expr, expr.name.lexeme)
+
+    def visit_block_stmt(self, stmt: Block) -> None:
+        self._scopes.append({})
+        self._statements(stmt.statements)
+        self._scopes.pop()
+
+    def visit_class_stmt(self, stmt: Class) -> None:
+        self._declare(id(stmt), stmt.name.lexeme)
+
+        if stmt.superclass is not None:
+            self._analyze(stmt.superclass)
+            self._scopes.append({})
+            self._declare(id(stmt.superclass), "super")
+
+        for method in stmt.methods:
+            self._analyze_function(method, True)
+
+        if stmt.superclass is not None:
+            self._scopes.pop()
+
+    def visit_expression_stmt(self, stmt: Expression) -> None:
+        self._analyze(stmt.expression)
+
+    def visit_function_stmt(self, stmt: Function) -> None:
+        self._declare(id(stmt), stmt.name.lexeme)
+        self._analyze_function(stmt, False)
+
+    def visit_if_stmt(self, stmt: If) -> None:
+        self._analyze(stmt.condition)
+        self._analyze(stmt.then_branch)
+        if stmt.else_branch is not None:
+            self._analyze(stmt.else_branch)
+
+    def visit_print_stmt(self, stmt: Print) -> None:
+        self._analyze(stmt.expression)
+
+    def visit_return_stmt(self, stmt: Return) -> None:
+        if stmt.value is not None:
+            self._analyze(stmt.value)
+
+    def visit_var_stmt(self, stmt: Var) -> None:
+        # declared first, as the resolver does, since the initializer may assign to it
+        self._declare(id(stmt), stmt.name.lexeme)
+        if stmt.initializer is not None:
+            self._analyze(stmt.initializer)
+
+    def visit_while_stmt(self, stmt: While) -> None:
+        if stmt.condition is not None:
+            self._analyze(stmt.condition)
+        self._function.loop_depth += 1
+        self._analyze(stmt.body)
+        self._function.loop_depth -= 1
+
+    def _analyze(self, node: Expr | Stmt) -> None:
+        node.accept(self)
+
+    def _statements(self, statements: list[Stmt]) -> None:
+        for statement in statements:
+            self._analyze(statement)
+
+    def _analyze_function(self, function: Function, is_method: bool) -> None:
+        self._function = _Function(self._function)
+        self.functions[id(function)] = self._function
+
+        self._scopes.append({})
+        if is_method:
+            # methods receive 'this' as an ordinary parameter, so it never needs renaming or a box
+            self._scopes[-1]["this"] = _Variable("this", None, False)
+
+        for param in function.params:
+            self._declare(id(param), param.lexeme)
+        self._statements(function.body)
+        self._scopes.pop()
+
+        self._function = self._function.enclosing
+
+    def _declare(self, key: int, lexeme: str) -> None:
+        if len(self._scopes) == 0:
+            return
+
+        self._counter += 1
+        variable = _Variable(f"{lexeme}_{self._counter}", self._function, self._function.loop_depth > 0)
+        self._scopes[-1][lexeme] = variable
+        self.declarations[key] = variable
+
+    def _reference(self, expr: Resolvable, lexeme: str) -> Optional[_Variable]:
+        if expr.depth is None:
+            return None
+
+        variable: _Variable = self._scopes[-1 - expr.depth][lexeme]
+        self.references[expr] = variable
+
+        function: Optional[_Function] = self._function
+        while function is not variable.function and function is not None:
+            variable.captured = True
+            function.free[variable] = None
+            function = function.enclosing
+
+        return variable
+
+
+class Transpiler(ExprVisitor, StmtVisitor):
+    # Translates a resolved program into the source of a Python function, '_main'. Lox locals
+    # become Python locals, globals live in the interpreter's global environment 'G', and the
+    # tokens needed for error reporting are kept in 'K', next to the property caches in 'C'.
+    # 'lines' maps each generated source line back to the Lox line it came from.
+
+    def __init__(self):
+        self._analyzer: Final = _ScopeAnalyzer()
+        self._source: Final[list[str]] = []
+        self._indent = 0
+        self._temps = 0
+        self._line = 0
+        self._function: Optional[Function] = None
+        self._is_initializer = False
+
+        self.tokens: Final[list[Token]] = []
+        self.caches: Final[list[InlineCache]] = []
+        self.lines: Final[list[int]] = [0]
+
+    def transpile(self, statements: list[Stmt]) -> str:
+        self._analyzer.analyze(statements)
+
+        self._emit("def _main():")
+        self._indent += 1
+        self._statements(statements)
+        self._emit("pass")
+        self._indent -= 1
+
+        return "\n".join(self._source) + "\n"
+
+    def visit_assign_expr(self, expr: Assign) -> str:
+        value: str = self._generate(expr.value)
+        token: str = self._token(expr.name)
+
+        variable: Optional[_Variable] = self._analyzer.references.get(expr)
+        if variable is None:
+            return f"_assign_global({token}, {value})"
+
+        if variable.boxed:
+            temp: str = self._temp()
+            return f"({variable.pyname}.__setitem__(0, {temp} := {value}) or {temp})"
+
+        return f"({variable.pyname} := {value})"
+
+    def visit_binary_expr(self, expr: Binary) -> str:
+        left: str = self._generate(expr.left)
+        right: str = self._generate(expr.right)
+        token: str = self._token(expr.operator)
+        a: str = self._temp()
+        b: str = self._temp()
+
+        # the walrus targets keep Lox's evaluation order: both operands, then the type check
+        both_numbers: str = f"type({a} := {left}) is type({b} := {right}) is float"
+        numbers_error: str = f"_error({token}, 'Operands must be numbers.')"
+
+        match expr.operator.type:
+            case TokenType.BANG_EQUAL:
+                return f"((type({a} := {left}) is not type({b} := {right}) or {a} != {b}) and not _strings_equal({a}, {b}))"
+            case TokenType.EQUAL_EQUAL:
+                return f"(type({a} := {left}) is type({b} := {right}) and {a} == {b} or _strings_equal({a}, {b}))"
+            case TokenType.PLUS:
+                return (f"({a} + {b} if type({a} := {left}) is type({b} := {right}) is float else _concat({a}, {b}) "
+                        f"if (type({a}) is str or type({a}) is Rope) and (type({b}) is str or type({b}) is Rope) "
+                        f"else _error({token}, 'Operands must be two numbers or two strings.'))")
+            case TokenType.SLASH:
+                return f"(({a} / {b} if {b} else _divide({a}, {b})) if {both_numbers} else {numbers_error})"
+
+        operator: str = {
+            TokenType.GREATER: ">",
+            TokenType.GREATER_EQUAL: ">=",
+            TokenType.LESS: "<",
+            TokenType.LESS_EQUAL: "<=",
+            TokenType.MINUS: "-",
+            TokenType.STAR: "*",
+        }[expr.operator.type]
+
+        return f"({a} {operator} {b} if {both_numbers} else {numbers_error})"
+
+    def visit_call_expr(self, expr: Call) -> str:
+        if type(expr.callee) is Get:
+            return self._invoke(expr, expr.callee)
+
+        callee: str = self._generate(expr.callee)
+        arguments: str = ", ".join(self._generate(argument) for argument in expr.arguments)
+        token: str = self._token(expr.paren)
+        function: str = self._temp()
+        count: int = len(expr.arguments)
+
+        # the callee is checked before the arguments run, but anything other than a transpiled
+        # function of the right arity is routed through _call_value, which reports errors only
+        # once the arguments have been evaluated
+        return (f"({function}.function if type({function} := {callee}) is TranspiledFunction "
+                f"and {function}.param_count == {count} else partial(_call_value, {function}, {token}))({arguments})")
+
+    def _invoke(self, expr: Call, get: Get) -> str:
+        obj: str = self._generate(get.obj)
+        name: str = self._token(get.name)
+        cache: str = self._cache(get.cache)
+        receiver: str = self._temp()
+        arguments: list[str] = [receiver] + [self._generate(argument) for argument in expr.arguments]
+        token: str = self._token(expr.paren)
+        method: str = self._temp()
+        count: int = len(expr.arguments)
+
+        # _method returns the unbound method, or the value of a field that shadows it wrapped in a
+        # tuple; methods are called with the receiver as their first argument, without binding
+        return (f"({method}.function if type({method} := _method({cache}, {receiver} := {obj}, {name})) "
+                f"is TranspiledFunction and {method}.param_count == {count} "
+                f"else partial(_call_property, {method}, {token}))({', '.join(arguments)})")
+
+    def visit_get_expr(self, expr: Get) -> str:
+        obj: str = self._generate(expr.obj)
+        token: str = self._token(expr.name)
+        cache: str = self._cache(expr.cache)
+        temp: str = self._temp()
+        return (f"({cache}.get({temp}, {token}) if type({temp} := {obj}) is LoxInstance "
+                f"else _error({token}, 'Only instances have properties.'))")
+
+    def visit_grouping_expr(self, expr: Grouping) -> str:
+        return self._generate(expr.expression)
+
+    def visit_literal_expr(self, expr: Literal) -> str:
+        return repr(expr.value)
+
+    def visit_logical_expr(self, expr: Logical) -> str:
+        left: str = self._generate(expr.left)
+        right: str = self._generate(expr.right)
+        temp: str = self._temp()
+        truthy: str = f"({temp} := {left}) is not None and {temp} is not False"
+
+        if expr.operator.type == TokenType.OR:
+            return f"({temp} if {truthy} else {right})"
+
+        return f"({right} if {truthy} else {temp})"
+
+    def visit_set_expr(self, expr: Set) -> str:
+        obj: str = self._generate(expr.obj)
+        value: str = self._generate(expr.value)
+        token: str = self._token(expr.name)
+        cache: str = self._cache(expr.cache)
+        temp: str = self._temp()
+        return (f"(_set_field({cache}, {temp}, {token}, {value}) if type({temp} := {obj}) is LoxInstance "
+                f"else _error({token}, 'Only instances have fields.'))")
+
+    def visit_super_expr(self, expr: Super) -> str:
+        superclass: str = self._read(self._analyzer.references[expr])
+        return f"_super({superclass}, this, {self._token(expr.method)})"
+
+    def visit_this_expr(self, expr: This) -> str:
+        self._mark(expr.keyword)
+        return "this"
+
+    def visit_unary_expr(self, expr: Unary) -> str:
+        right: str = self._generate(expr.right)
+        token: str = self._token(expr.operator)
+        temp: str = self._temp()
+
+        if expr.operator.type == TokenType.BANG:
+            return f"(({temp} := {right}) is None or {temp} is False)"
+
+        return f"(-{temp} if type({temp} := {right}) is float else _error({token}, 'Operand must be a number.'))"
+
+    def visit_variable_expr(self, expr: Variable) -> str:
+        self._mark(expr.name)
+
+        variable: Optional[_Variable] = self._analyzer.references.get(expr)
+        if variable is None:
+            return f"_get_global({self._token(expr.name)})"
+
+        return self._read(variable)
+
+    def visit_block_stmt(self, stmt: Block) -> None:
+        # Python has no block scope; every local already has a unique name
+        self._statements(stmt.statements)
+
+    def visit_class_stmt(self, stmt: Class) -> None:
+        self._mark(stmt.name)
+
+        superclass: str = "None"
+        if stmt.superclass is not None:
+            superclass = self._temp()
+            token: str = self._token(stmt.superclass.name)
+            self._emit(f"{superclass} = _check_superclass({self._generate(stmt.superclass)}, {token})")
+
+        self._declare(id(stmt), stmt.name.lexeme, "None")
+
+        if stmt.superclass is not None:
+            self._declare(id(stmt.superclass), "super", superclass)
+
+        methods: list[str] = []
+        for method in stmt.methods:
+            function: str = self._emit_function(method, True)
+            is_initializer: bool = method.name.lexeme == "init"
+            methods.append(f"{method.name.lexeme!r}: "
+                           f"TranspiledFunction({method.name.lexeme!r}, {function}, {len(method.params)}, {is_initializer})")
+
+        klass: str = f"LoxClass({stmt.name.lexeme!r}, {superclass}, {{{', '.join(methods)}}})"
+        self._emit(self._define(id(stmt), stmt.name.lexeme, klass))
+
+    def visit_expression_stmt(self, stmt: Expression) -> None:
+        self._emit(self._generate(stmt.expression))
+
+    def visit_function_stmt(self, stmt: Function) -> None:
+        self._mark(stmt.name)
+
+        variable: Optional[_Variable] = self._analyzer.declarations.get(id(stmt))
+        if variable is not None and variable.boxed:
+            # create the box first, so the function can capture it to call itself
+            self._emit(f"{variable.pyname} = [None]")
+
+        function: str = self._emit_function(stmt, False)
+        value: str = f"TranspiledFunction({stmt.name.lexeme!r}, {function}, {len(stmt.params)}, False)"
+        self._emit(self._define(id(stmt), stmt.name.lexeme, value))
+
+    def visit_if_stmt(self, stmt: If) -> None:
+        temp: str = self._temp()
+        self._emit(f"if ({temp} := {self._generate(stmt.condition)}) is not None and {temp} is not False:")
+        self._block(stmt.then_branch)
+
+        if stmt.else_branch is not None:
+            self._emit("else:")
+            self._block(stmt.else_branch)
+
+    def visit_print_stmt(self, stmt: Print) -> None:
+        self._emit(f"print(_stringify({self._generate(stmt.expression)}))")
+
+    def visit_return_stmt(self, stmt: Return) -> None:
+        self._mark(stmt.keyword)
+
+        if self._is_initializer:
+            self._emit("return this")
+        elif stmt.value is None:
+            self._emit("return None")
+        else:
+            self._emit(f"return {self._generate(stmt.value)}")
+
+    def visit_var_stmt(self, stmt: Var) -> None:
+        self._mark(stmt.name)
+
+        variable: Optional[_Variable] = self._analyzer.declarations.get(id(stmt))
+        if stmt.initializer is not None and variable is not None and variable.boxed:
+            # create the box first, so an assignment in the initializer has somewhere to go
+            self._emit(f"{variable.pyname} = [None]")
+            self._emit(self._define(id(stmt), stmt.name.lexeme, self._generate(stmt.initializer)))
+            return
+
+        value: str = "None" if stmt.initializer is None else self._generate(stmt.initializer)
+        self._declare(id(stmt), stmt.name.lexeme, value)
+
+    def visit_while_stmt(self, stmt: While) -> None:
+        if stmt.condition is None:
+            self._emit("while True:")
+        else:
+            temp: str = self._temp()
+            self._emit(f"while ({temp} := {self._generate(stmt.condition)}) is not None and {temp} is not False:")
+        self._block(stmt.body)
+
+    def _generate(self, node: Expr | Stmt) -> Any:
+        return node.accept(self)
+
+    def _statements(self, statements: list[Stmt]) -> None:
+        for statement in statements:
+            self._generate(statement)
+
+    def _block(self, stmt: Stmt) -> None:
+        self._indent += 1
+        start: int = len(self._source)
+        self._generate(stmt)
+        if len(self._source) == start:
+            self._emit("pass")
+        self._indent -= 1
+
+    def _emit_function(self, stmt: Function, is_method: bool) -> str:
+        info: _Function = self._analyzer.functions[id(stmt)]
+        name: str = f"_{stmt.name.lexeme}_{self._temp()}"
+
+        params: list[str] = [self._analyzer.declarations[id(param)].pyname for param in stmt.params]
+        if is_method:
+            params.insert(0, "this")
+
+        # boxes are bound as keyword defaults, so each function object keeps the boxes that
+        # were current when its declaration ran
+        boxes: list[str] = [f"{v.pyname}={v.pyname}" for v in info.free if v.boxed]
+        if len(boxes) != 0:
+            params.append("*")
+            params.extend(boxes)
+
+        self._emit(f"def {name}({', '.join(params)}):")
+        self._indent += 1
+
+        nonlocals: list[str] = [v.pyname for v in info.assigned if not v.boxed]
+        if len(nonlocals) != 0:
+            self._emit(f"nonlocal {', '.join(nonlocals)}")
+
+        enclosing_function, enclosing_initializer = self._function, self._is_initializer
+        self._function, self._is_initializer = stmt, is_method and stmt.name.lexeme == "init"
+
+        self._statements(stmt.body)
+        self._emit("return this" if self._is_initializer else "return None")
+
+        self._function, self._is_initializer = enclosing_function, enclosing_initializer
+        self._indent -= 1
+        return name
+
+    def _declare(self, key: int, lexeme: str, value: str) -> None:
+        variable: Optional[_Variable] = self._analyzer.declarations.get(key)
+        if variable is None:
+            self._emit(f"G[{lexeme!r}] = {value}")
+        elif variable.boxed:
+            self._emit(f"{variable.pyname} = [{value}]")
+        else:
+            self._emit(f"{variable.pyname} = {value}")
+
+    def _define(self, key: int, lexeme: str, value: str) -> str:
+        variable: Optional[_Variable] = self._analyzer.declarations.get(key)
+        if variable is None:
+            return f"G[{lexeme!r}] = {value}"
+
+        if variable.boxed:
+            return f"{variable.pyname}[0] = {value}"
+
+        return f"{variable.pyname} = {value}"
+
+    def _read(self, variable: _Variable) -> str:
+        if variable.boxed:
+            return f"{variable.pyname}[0]"
+
+        return variable.pyname
+
+    def _temp(self) -> str:
+        self._temps += 1
+        return f"_t{self._temps}"
+
+    def _mark(self, token: Token) -> None:
+        self._line = token.line
+
+    def _token(self, token: Token) -> str:
+        self._mark(token)
+        self.tokens.append(token)
+        return f"K[{len(self.tokens) - 1}]"
+
+    def _cache(self, cache: InlineCache) -> str:
+        self.caches.append(cache)
+        return f"C[{len(self.caches) - 1}]"
+
+    def _emit(self, code: str) -> None:
+        self._source.append("    " * self._indent + code)
+        self.lines.append(self._line)
+
+
+class TranspilingInterpreter(Interpreter):
+    # Runs programs by translating them to Python source and letting CPython execute it.
+
+    def interpret(self, statements: list[Stmt]) -> None:
+        transpiler = Transpiler()
+        source: str = transpiler.transpile(statements)
+        try:
+            code: CodeType = compile(source, _FILENAME, "exec")
+        except (SyntaxError, RecursionError, MemoryError):
+            # CPython caps how deeply blocks and expressions nest, which Lox doesn't, so a program
+            # nested past that is walked as a tree instead
+            super().interpret(statements)
+            return
+
+        # the Python line to Lox line table lives as long as the functions defined by this code,
+        # which may still fail in a later call to interpret
+        namespace: dict[str, Any] = self._runtime(transpiler.tokens, transpiler.caches)
+        namespace["_lines"] = transpiler.lines
+        exec(code, namespace)
+
+        try:
+            namespace["_main"]()
+        except LoxRuntimeError as e:
+            LoxErrors.runtime_error(e)
+        except RecursionError as e:
+            # Lox calls are Python calls here, so the deepest Lox line on the traceback made the call
+            line: int = self._failing_line(e.__traceback__)
+            paren = Token(TokenType.RIGHT_PAREN, ")", None, line)
+            LoxErrors.runtime_error(LoxRuntimeError(paren, "Stack overflow."))
+
+    def _runtime(self, tokens: list[Token], caches: list[InlineCache]) -> dict[str, Any]:
+        values: dict[str, Any] = self.globals.values
+
+        def error(token: Token, message: str) -> Any:
+            raise LoxRuntimeError(token, message)
+
+        def get_global(name: Token) -> Any:
+            try:
+                return values[name.lexeme]
+            except KeyError:
+                raise LoxRuntimeError(name, f"Undefined variable '{name.lexeme}'.") from None
+
+        def assign_global(name: Token, value: Any) -> Any:
+            if name.lexeme not in values:
+                raise LoxRuntimeError(name, f"Undefined variable '{name.lexeme}'.")
+            values[name.lexeme] = value
+            return value
+
+        def call_value(callee: Any, paren: Token, *arguments: Any) -> Any:
+            if type(callee) is LoxNative:
+                return callee.call_at(paren, list(arguments))
+
+            if not isinstance(callee, LoxCallable):
+                raise LoxRuntimeError(paren, "Can only call functions and classes.")
+
+            arity: int = callee.arity()
+            if len(arguments) != arity:
+                raise LoxRuntimeError(paren, f"Expected {arity} arguments but got {len(arguments)}.")
+
+            return callee.call(self, list(arguments))
+
+        def method(cache: InlineCache, receiver: Any, name: Token) -> Any:
+            if type(receiver) is not LoxInstance:
+                raise LoxRuntimeError(name, "Only instances have properties.")
+
+            entry: Any = cache.look_up(receiver, name)
+            if type(entry) is int:
+                return (receiver.fields[entry],)
+
+            return entry
+
+        def call_property(entry: Any, paren: Token, receiver: LoxInstance, *arguments: Any) -> Any:
+            if type(entry) is tuple:
+                return call_value(entry[0], paren, *arguments)
+
+            return call_value(entry.bind(receiver), paren, *arguments)
+
+        def set_field(cache: InlineCache, obj: LoxInstance, name: Token, value: Any) -> Any:
+            cache.set(obj, name, value)
+            return value
+
+        def super_(superclass: LoxClass, obj: LoxInstance, method: Token) -> Any:
+            function: TranspiledFunction = superclass.find_method(method.lexeme)
+            if function is None:
+                raise LoxRuntimeError(method, f"Undefined property '{method.lexeme}'.")
+
+            return function.bind(obj)
+
+        def check_superclass(superclass: Any, name: Token) -> LoxClass:
+            if not isinstance(superclass, LoxClass):
+                raise LoxRuntimeError(name, "Superclass must be a class.")
+
+            return superclass
+
+        return {
+            "G": values,
+            "K": tokens,
+            "C": caches,
+            "LoxClass": LoxClass,
+            "LoxInstance": LoxInstance,
+            "Rope": Rope,
+            "TranspiledFunction": TranspiledFunction,
+            "partial": partial,
+            "_assign_global": assign_global,
+            "_call_property": call_property,
+            "_call_value": call_value,
+            "_check_superclass": check_superclass,
+            "_concat": self._concat,
+            "_divide": self._divide,
+            "_error": error,
+            "_get_global": get_global,
+            "_method": method,
+            "_set_field": set_field,
+            "_stringify": self._stringify,
+            "_strings_equal": strings_equal,
+            "_super": super_,
+        }
+
+    def _failing_line(self, traceback: Optional[TracebackType]) -> int:
+        line: int = 0
+        while traceback is not None:
+            frame: FrameType = traceback.tb_frame
+            if frame.f_code.co_filename == _FILENAME:
+                line = frame.f_globals["_lines"][traceback.tb_lineno]
+            traceback = traceback.tb_next
+
+        return line
@@ -4,6 +4,7 @@ from typing import TYPE_CHECKING, Any
 
 if TYPE_CHECKING:
     from .expr import Assign, Binary, Call, Get, Grouping, Literal, Logical, Set, Super, This, Unary, Variable
+    from .quickening import QuickenedBinary
     from .stmt import Block, Class, Expression, Function, If, Print, Return, Var, While
 
 
@@ -56,6 +57,10 @@ class ExprVisitor(ABC):
     def visit_variable_expr(self, expr: Variable) -> Any:
         raise NotImplementedError
 
+    # only the tree interpreter quickens nodes; to every other visitor they are ordinary Binary nodes
+    def visit_quickened_binary_expr(self, expr: QuickenedBinary) -> Any:
+        return self.visit_binary_expr(expr)
+
 
 class StmtVisitor(ABC):
     @abstractmethod
@@ -0,0 +1,518 @@
+from __future__ import annotations
+from enum import Enum, auto
+from typing import TYPE_CHECKING, Any, Final, Optional
+
+from ..errors import LoxErrors
+from ..expr import Call, Get, Super
+from ..tokens import Token, TokenType
+from ..visitor import ExprVisitor, StmtVisitor
+from .chunk import Chunk, OpCode
+from .object import ObjFunction
+
+if TYPE_CHECKING:
+    from ..expr import Assign, Binary, Expr, Grouping, Literal, Logical, Set, This, Unary, Variable
+    from ..stmt import Stmt, Block, Class, Expression, Function, If, Print, Return, Var, While
+
+UINT8_COUNT: Final = 256
+
+
+class _FunctionType(Enum):
+    FUNCTION = auto()
+    INITIALIZER = auto()
+    METHOD = auto()
+    SCRIPT = auto()
+
+
+class _CompileError(Exception):
+    pass
+
+
+class _Local:
+    def __init__(self, name: str, depth: int):
+        self.name: Final = name
+        self.depth = depth
+        self.is_captured = False
+
+
+class _Upvalue:
+    def __init__(self, index: int, is_local: bool):
+        self.index: Final = index
+        self.is_local: Final = is_local
+
+
+class _FunctionState:
+    def __init__(self, enclosing: Optional[_FunctionState], type: _FunctionType, name: Optional[str]):
+        self.enclosing: Final = enclosing
+        self.function: Final = ObjFunction(name)
+        self.type: Final = type
+        self.upvalues: Final[list[_Upvalue]] = []
+        self.identifiers: Final[dict[str, int]] = {}
+        self.scope_depth = 0
+
+        # slot zero holds the callee, or the receiver for methods and initializers
+        slot_zero = "this" if type in (_FunctionType.METHOD, _FunctionType.INITIALIZER) else ""
+        self.locals: Final[list[_Local]] = [_Local(slot_zero, 0)]
+
+
+class _ClassState:
+    def __init__(self, enclosing: Optional[_ClassState]):
+        self.enclosing: Final = enclosing
+        self.has_superclass = False
+
+
+class Compiler(ExprVisitor, StmtVisitor):
+    # Compiles resolved statements into clox-style bytecode. Local slots and upvalues are
+    # worked out here, the same way clox's single-pass compiler does, so the compiler only
+    # depends on the tree and not on the tree-walking interpreter's side tables.
+
+    def __init__(self):
+        self._current: Optional[_FunctionState] = None
+        self._current_class: Optional[_ClassState] = None
+        self._token: Optional[Token] = None
+        self._line = 1
+
+    def compile(self, statements: list[Stmt]) -> Optional[ObjFunction]:
+        self._current = _FunctionState(None, _FunctionType.SCRIPT, None)
+
+        try:
+            for statement in statements:
+                self._compile(statement)
+        except _CompileError:
+            return None
+
+        return self._end_function()
+
+    def visit_assign_expr(self, expr: Assign) -> None:
+        self._compile(expr.value)
+        self._named_variable(expr.name, True)
+
+    def visit_binary_expr(self, expr: Binary) -> None:
+        self._compile(expr.left)
+        self._compile(expr.right)
+        self._mark(expr.operator)
+
+        match expr.operator.type:
+            case TokenType.BANG_EQUAL: self._emit_bytes(OpCode.EQUAL, OpCode.NOT)
+            case TokenType.EQUAL_EQUAL: self._emit_byte(OpCode.EQUAL)
+            case TokenType.GREATER: self._emit_byte(OpCode.GREATER)
+            case TokenType.GREATER_EQUAL: self._emit_byte(OpCode.GREATER_EQUAL)
+            case TokenType.LESS: self._emit_byte(OpCode.LESS)
+            case TokenType.LESS_EQUAL: self._emit_byte(OpCode.LESS_EQUAL)
+            case TokenType.PLUS: self._emit_byte(OpCode.ADD)
+            case TokenType.MINUS: self._emit_byte(OpCode.SUBTRACT)
+            case TokenType.STAR: self._emit_byte(OpCode.MULTIPLY)
+            case TokenType.SLASH: self._emit_byte(OpCode.DIVIDE)
+
+    def visit_call_expr(self, expr: Call) -> None:
+        self._call(expr, False)
+
+    def _call(self, expr: Call, tail: bool) -> None:
+        # in tail position the callee may take over this function's frame
+        if isinstance(expr.callee, Get):
+            self._compile(expr.callee.obj)
+            name: int = self._identifier_constant(expr.callee.name)
+            self._arguments(expr)
+            self._emit_bytes(OpCode.TAIL_INVOKE if tail else OpCode.INVOKE, name)
+            self._emit_byte(len(expr.arguments))
+            return
+
+        if isinstance(expr.callee, Super):
+            self._synthetic_variable(expr.callee.keyword, "this")
+            name: int = self._identifier_constant(expr.callee.method)
+            self._arguments(expr)
+            self._synthetic_variable(expr.callee.keyword, "super")
+            self._mark(expr.paren)
+            self._emit_bytes(OpCode.TAIL_SUPER_INVOKE if tail else OpCode.SUPER_INVOKE, name)
+            self._emit_byte(len(expr.arguments))
+            return
+
+        self._compile(expr.callee)
+        self._arguments(expr)
+        self._emit_bytes(OpCode.TAIL_CALL if tail else OpCode.CALL, len(expr.arguments))
+
+    def visit_get_expr(self, expr: Get) -> None:
+        self._compile(expr.obj)
+        self._mark(expr.name)
+        self._emit_bytes(OpCode.GET_PROPERTY, self._identifier_constant(expr.name))
+
+    def visit_grouping_expr(self, expr: Grouping) -> None:
+        self._compile(expr.expression)
+
+    def visit_literal_expr(self, expr: Literal) -> None:
+        if expr.value is None:
+            self._emit_byte(OpCode.NIL)
+        elif expr.value is True:
+            self._emit_byte(OpCode.TRUE)
+        elif expr.value is False:
+            self._emit_byte(OpCode.FALSE)
+        else:
+            self._emit_constant(expr.value)
+
+    def visit_logical_expr(self, expr: Logical) -> None:
+        self._compile(expr.left)
+
+        if expr.operator.type == TokenType.AND:
+            end_jump: int = self._emit_jump(OpCode.JUMP_IF_FALSE)
+            self._emit_byte(OpCode.POP)
+            self._compile(expr.right)
+            self._patch_jump(end_jump)
+        else:
+            else_jump: int = self._emit_jump(OpCode.JUMP_IF_FALSE)
+            end_jump: int = self._emit_jump(OpCode.JUMP)
+            self._patch_jump(else_jump)
+            self._emit_byte(OpCode.POP)
+            self._compile(expr.right)
+            self._patch_jump(end_jump)
+
+    def visit_set_expr(self, expr: Set) -> None:
+        self._compile(expr.obj)
+        self._compile(expr.value)
+        self._mark(expr.name)
+        self._emit_bytes(OpCode.SET_PROPERTY, self._identifier_constant(expr.name))
+
+    def visit_super_expr(self, expr: Super) -> None:
+        name: int = self._identifier_constant(expr.method)
+        self._synthetic_variable(expr.keyword, "this")
+        self._synthetic_variable(expr.keyword, "super")
+        self._mark(expr.method)
+        self._emit_bytes(OpCode.GET_SUPER, name)
+
+    def visit_this_expr(self, expr: This) -> None:
+        self._named_variable(expr.keyword, False)
+
+    def visit_unary_expr(self, expr: Unary) -> None:
+        self._compile(expr.right)
+        self._mark(expr.operator)
+
+        match expr.operator.type:
+            case TokenType.BANG: self._emit_byte(OpCode.NOT)
+            case TokenType.MINUS: self._emit_byte(OpCode.NEGATE)
+
+    def visit_variable_expr(self, expr: Variable) -> None:
+        self._named_variable(expr.name, False)
+
+    def visit_block_stmt(self, stmt: Block) -> None:
+        self._begin_scope()
+        for statement in stmt.statements:
+            self._compile(statement)
+        self._end_scope()
+
+    def visit_class_stmt(self, stmt: Class) -> None:
+        self._mark(stmt.name)
+        name_constant: int = self._identifier_constant(stmt.name)
+        self._declare_variable(stmt.name)
+
+        self._emit_bytes(OpCode.CLASS, name_constant)
+        self._define_variable(name_constant)
+
+        class_state = _ClassState(self._current_class)
+        self._current_class = class_state
+
+        if stmt.superclass is not None:
+            self._compile(stmt.superclass)
+
+            self._begin_scope()
+            self._add_local("super")
+            self._define_variable(0)
+
+            self._named_variable(stmt.name, False)
+            self._mark(stmt.superclass.name)
+            self._emit_byte(OpCode.INHERIT)
+            class_state.has_superclass = True
+
+        self._named_variable(stmt.name, False)
+        for method in stmt.methods:
+            constant: int = self._identifier_constant(method.name)
+            type = _FunctionType.INITIALIZER if method.name.lexeme == "init" else _FunctionType.METHOD
+            self._function(method, type)
+            self._emit_bytes(OpCode.METHOD, constant)
+        self._emit_byte(OpCode.POP)
+
+        if class_state.has_superclass:
+            self._end_scope()
+
+        self._current_class = class_state.enclosing
+
+    def visit_expression_stmt(self, stmt: Expression) -> None:
+        self._compile(stmt.expression)
+        self._emit_byte(OpCode.POP)
+
+    def visit_function_stmt(self, stmt: Function) -> None:
+        self._mark(stmt.name)
+        global_constant: int = self._parse_variable(stmt.name)
+        self._mark_initialized()
+        self._function(stmt, _FunctionType.FUNCTION)
+        self._define_variable(global_constant)
+
+    def visit_if_stmt(self, stmt: If) -> None:
+        self._compile(stmt.condition)
+
+        then_jump: int = self._emit_jump(OpCode.JUMP_IF_FALSE)
+        self._emit_byte(OpCode.POP)
+        self._compile(stmt.then_branch)
+
+        else_jump: int = self._emit_jump(OpCode.JUMP)
+
+        self._patch_jump(then_jump)
+        self._emit_byte(OpCode.POP)
+
+        if stmt.else_branch is not None:
+            self._compile(stmt.else_branch)
+        self._patch_jump(else_jump)
+
+    def visit_print_stmt(self, stmt: Print) -> None:
+        self._compile(stmt.expression)
+        self._emit_byte(OpCode.PRINT)
+
+    def visit_return_stmt(self, stmt: Return) -> None:
+        self._mark(stmt.keyword)
+
+        if stmt.value is None:
+            self._emit_return()
+        elif isinstance(stmt.value, Call):
+            # the callee may take over this function's frame, in which case the RETURN is never reached
+            self._call(stmt.value, True)
+            self._emit_byte(OpCode.RETURN)
+        else:
+            self._compile(stmt.value)
+            self._emit_byte(OpCode.RETURN)
+
+    def visit_var_stmt(self, stmt: Var) -> None:
+        self._mark(stmt.name)
+        global_constant: int = self._parse_variable(stmt.name)
+
+        if stmt.initializer is not None:
+            self._compile(stmt.initializer)
+        else:
+            self._emit_byte(OpCode.NIL)
+
+        self._define_variable(global_constant)
+
+    def visit_while_stmt(self, stmt: While) -> None:
+        loop_start: int = len(self._current_chunk().code)
+
+        if stmt.condition is None:
+            self._compile(stmt.body)
+            self._emit_loop(loop_start)
+            return
+
+        self._compile(stmt.condition)
+
+        exit_jump: int = self._emit_jump(OpCode.JUMP_IF_FALSE)
+        self._emit_byte(OpCode.POP)
+        self._compile(stmt.body)
+        self._emit_loop(loop_start)
+
+        self._patch_jump(exit_jump)
+        self._emit_byte(OpCode.POP)
+
+    def _compile(self, node: Expr | Stmt) -> None:
+        node.accept(self)
+
+    def _current_chunk(self) -> Chunk:
+        return self._current.function.chunk
+
+    def _mark(self, token: Token) -> None:
+        self._token = token
+        self._line = token.line
+
+    def _error(self, message: str) -> None:
+        if self._token is None:
+            LoxErrors.error(self._line, message)
+        else:
+            LoxErrors.token_error(self._token, message)
+
+        raise _CompileError()
+
+    def _emit_byte(self, byte: int) -> None:
+        self._current_chunk().write(byte, self._line)
+
+    def _emit_bytes(self, byte1: int, byte2: int) -> None:
+        self._emit_byte(byte1)
+        self._emit_byte(byte2)
+
+    def _emit_loop(self, loop_start: int) -> None:
+        self._emit_byte(OpCode.LOOP)
+
+        offset: int = len(self._current_chunk().code) - loop_start + 2
+        if offset > 0xffff:
+            self._error("Loop body too large.")
+
+        self._emit_byte((offset >> 8) & 0xff)
+        self._emit_byte(offset & 0xff)
+
+    def _emit_jump(self, instruction: int) -> int:
+        self._emit_byte(instruction)
+        self._emit_byte(0xff)
+        self._emit_byte(0xff)
+        return len(self._current_chunk().code) - 2
+
+    def _emit_return(self) -> None:
+        if self._current.type == _FunctionType.INITIALIZER:
+            self._emit_bytes(OpCode.GET_LOCAL, 0)
+        else:
+            self._emit_byte(OpCode.NIL)
+
+        self._emit_byte(OpCode.RETURN)
+
+    def _make_constant(self, value: Any) -> int:
+        constant: int = self._current_chunk().add_constant(value)
+        if constant >= UINT8_COUNT:
+            self._error("Too many constants in one chunk.")
+
+        return constant
+
+    def _emit_constant(self, value: Any) -> None:
+        self._emit_bytes(OpCode.CONSTANT, self._make_constant(value))
+
+    def _patch_jump(self, offset: int) -> None:
+        code: bytearray = self._current_chunk().code
+
+        # -2 to adjust for the bytecode for the jump offset itself
+        jump: int = len(code) - offset - 2
+        if jump > 0xffff:
+            self._error("Too much code to jump over.")
+
+        code[offset] = (jump >> 8) & 0xff
+        code[offset + 1] = jump & 0xff
+
+    def _end_function(self) -> ObjFunction:
+        self._emit_return()
+        function: ObjFunction = self._current.function
+        self._current = self._current.enclosing
+        return function
+
+    def _begin_scope(self) -> None:
+        self._current.scope_depth += 1
+
+    def _end_scope(self) -> None:
+        state: _FunctionState = self._current
+        state.scope_depth -= 1
+
+        while len(state.locals) > 0 and state.locals[-1].depth > state.scope_depth:
+            if state.locals[-1].is_captured:
+                self._emit_byte(OpCode.CLOSE_UPVALUE)
+            else:
+                self._emit_byte(OpCode.POP)
+            state.locals.pop()
+
+    def _function(self, declaration: Function, type: _FunctionType) -> None:
+        self._current = _FunctionState(self._current, type, declaration.name.lexeme)
+        self._begin_scope()
+
+        for param in declaration.params:
+            self._current.function.arity += 1
+            self._mark(param)
+            constant: int = self._parse_variable(param)
+            self._define_variable(constant)
+
+        for statement in declaration.body:
+            self._compile(statement)
+
+        state: _FunctionState = self._current
+        function: ObjFunction = self._end_function()
+
+        self._emit_bytes(OpCode.CLOSURE, self._make_constant(function))
+        for upvalue in state.upvalues:
+            self._emit_byte(1 if upvalue.is_local else 0)
+            self._emit_byte(upvalue.index)
+
+    def _arguments(self, expr: Call) -> None:
+        for argument in expr.arguments:
+            self._compile(argument)
+        self._mark(expr.paren)
+
+    def _identifier_constant(self, name: Token) -> int:
+        # unlike clox, names share a single constant per chunk so that scripts with many
+        # globals don't run into the 256 constant limit
+        identifiers: dict[str, int] = self._current.identifiers
+        if name.lexeme not in identifiers:
+            identifiers[name.lexeme] = self._make_constant(name.lexeme)
+
+        return identifiers[name.lexeme]
+
+    def _resolve_local(self, state: _FunctionState, name: str) -> int:
+        for i in range(len(state.locals) - 1, -1, -1):
+            if state.locals[i].name == name:
+                return i
+
+        return -1
+
+    def _add_upvalue(self, state: _FunctionState, index: int, is_local: bool) -> int:
+        for i, upvalue in enumerate(state.upvalues):
+            if upvalue.index == index and upvalue.is_local == is_local:
+                return i
+
+        if len(state.upvalues) == UINT8_COUNT:
+            self._error("Too many closure variables in function.")
+
+        state.upvalues.append(_Upvalue(index, is_local))
+        state.function.upvalue_count = len(state.upvalues)
+        return len(state.upvalues) - 1
+
+    def _resolve_upvalue(self, state: _FunctionState, name: str) -> int:
+        if state.enclosing is None:
+            return -1
+
+        local: int = self._resolve_local(state.enclosing, name)
+        if local != -1:
+            state.enclosing.locals[local].is_captured = True
+            return self._add_upvalue(state, local, True)
+
+        upvalue: int = self._resolve_upvalue(state.enclosing, name)
+        if upvalue != -1:
+            return self._add_upvalue(state, upvalue, False)
+
+        return -1
+
+    def _add_local(self, name: str) -> None:
+        if len(self._current.locals) == UINT8_COUNT:
+            self._error("Too many local variables in function.")
+
+        self._current.locals.append(_Local(name, -1))
+
+    def _declare_variable(self, name: Token) -> None:
+        if self._current.scope_depth == 0:
+            return
+
+        self._add_local(name.lexeme)
+
+    def _parse_variable(self, name: Token) -> int:
+        self._declare_variable(name)
+        if self._current.scope_depth > 0:
+            return 0
+
+        return self._identifier_constant(name)
+
+    def _mark_initialized(self) -> None:
+        if self._current.scope_depth == 0:
+            return
+
+        self._current.locals[-1].depth = self._current.scope_depth
+
+    def _define_variable(self, global_constant: int) -> None:
+        if self._current.scope_depth > 0:
+            self._mark_initialized()
+            return
+
+        self._emit_bytes(OpCode.DEFINE_GLOBAL, global_constant)
+
+    def _named_variable(self, name: Token, can_assign: bool) -> None:
+        self._mark(name)
+        lexeme: str = name.lexeme
+
+        arg: int = self._resolve_local(self._current, lexeme)
+        if arg != -1:
+            get_op, set_op = OpCode.GET_LOCAL, OpCode.SET_LOCAL
+        else:
+            arg = self._resolve_upvalue(self._current, lexeme)
+            if arg != -1:
+                get_op, set_op = OpCode.GET_UPVALUE, OpCode.SET_UPVALUE
+            else:
+                arg = self._identifier_constant(name)
+                get_op, set_op = OpCode.GET_GLOBAL, OpCode.SET_GLOBAL
+
+        self._emit_bytes(set_op if can_assign else get_op, arg)
+
+    def _synthetic_variable(self, keyword: Token, lexeme: str) -> None:
+        self._named_variable(Token(TokenType.IDENTIFIER, lexeme, None, keyword.line), False)
@@ -0,0 +1,67 @@
+from __future__ import annotations
+from typing import Any, Final, Optional
+
+from .chunk import Chunk
+
+
+class ObjFunction:
+    def __init__(self, name: Optional[str]):
+        self.arity = 0
+        self.upvalue_count = 0
+        self.chunk: Final = Chunk()
+        self.name: Final = name
+
+    def __str__(self):
+        if self.name is None:
+            return "<script>"
+
+        return f"<fn {self.name}>"
+
+
+class ObjUpvalue:
+    # While open, an upvalue reads the VM stack at the captured slot. Closing it swaps
+    # the stack for a private one-element list, so reads never need to branch.
+    def __init__(self, stack: list[Any], location: int, next: Optional[ObjUpvalue]):
+        self.cells: list[Any] = stack
+        self.location = location
+        self.next = next
+
+    def close(self) -> None:
+        self.cells = [self.cells[self.location]]
+        self.location = 0
+
+
+class ObjClosure:
+    def __init__(self, function: ObjFunction):
+        self.function: Final = function
+        self.upvalues: Final[list[ObjUpvalue]] = []
+
+    def __str__(self):
+        return str(self.function)
+
+
+class ObjClass:
+    def __init__(self, name: str):
+        self.name: Final = name
+        self.methods: Final[dict[str, ObjClosure]] = {}
+
+    def __str__(self):
+        return self.name
+
+
+class ObjInstance:
+    def __init__(self, klass: ObjClass):
+        self.klass: Final = klass
+        self.fields: Final[dict[str, Any]] = {}
+
+    def __str__(self):
+        return f"{self.klass.name} instance"
+
+
+class ObjBoundMethod:
+    def __init__(self, receiver: Any, method: ObjClosure):
+        self.receiver: Final = receiver
+        self.method: Final = method
+
+    def __str__(self):
+        return str(self.method.function)
@@ -0,0 +1,49 @@
+import math
+from typing import Any
+
+from ..containers import LoxList, LoxMap
+from ..rope import strings_equal
+
+
+def is_falsey(value: Any) -> bool:
+    return value is None or value is False
+
+
+def values_equal(a: Any, b: Any) -> bool:
+    return type(a) is type(b) and a == b or strings_equal(a, b)
+
+
+def divide(a: float, b: float) -> float:
+    if b != 0.0:
+        return a / b
+
+    if a == 0.0 or math.isnan(a):
+        return math.nan
+
+    return math.copysign(math.inf, a) * math.copysign(1.0, b)
+
+
+def stringify(value: Any) -> str:
+    if value is None:
+        return "nil"
+
+    if type(value) is bool:
+        return "true" if value else "false"
+
+    if type(value) is float:
+        if math.isnan(value):
+            return "NaN"
+
+        if math.isinf(value):
+            return "Infinity" if value > 0 else "-Infinity"
+
+        text = str(value)
+        if text.endswith(".0"):
+            text = text[0:len(text) - 2]
+
+        return text
+
+    if type(value) is LoxList or type(value) is LoxMap:
+        return value.stringify(stringify)
+
+    return str(value)
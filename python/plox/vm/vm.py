@@ -0,0 +1,572 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Final, Optional
+
+from ..errors import LoxErrors, LoxRuntimeError
+from ..natives import NATIVES, LoxNative, NativeError
+from ..rope import Rope, concat, concat_interned
+from ..tokens import Token, TokenType
+from .chunk import OpCode
+from .compiler import Compiler
+from .object import ObjBoundMethod, ObjClass, ObjClosure, ObjFunction, ObjInstance, ObjUpvalue
+from .value import divide, stringify, values_equal
+
+if TYPE_CHECKING:
+    from ..stmt import Stmt
+
+# frames live on the heap rather than the Python stack, so the vm can go at least as deep as
+# CPython's default recursion limit lets the other engines; --max-frames tightens it
+FRAMES_MAX: Final = 1000
+
+_MISSING: Final = object()
+
+# plain ints, so comparing against them in the dispatch loop doesn't go through the enum
+_CONSTANT: Final = int(OpCode.CONSTANT)
+_NIL: Final = int(OpCode.NIL)
+_TRUE: Final = int(OpCode.TRUE)
+_FALSE: Final = int(OpCode.FALSE)
+_POP: Final = int(OpCode.POP)
+_GET_LOCAL: Final = int(OpCode.GET_LOCAL)
+_SET_LOCAL: Final = int(OpCode.SET_LOCAL)
+_GET_GLOBAL: Final = int(OpCode.GET_GLOBAL)
+_DEFINE_GLOBAL: Final = int(OpCode.DEFINE_GLOBAL)
+_SET_GLOBAL: Final = int(OpCode.SET_GLOBAL)
+_GET_UPVALUE: Final = int(OpCode.GET_UPVALUE)
+_SET_UPVALUE: Final = int(OpCode.SET_UPVALUE)
+_GET_PROPERTY: Final = int(OpCode.GET_PROPERTY)
+_SET_PROPERTY: Final = int(OpCode.SET_PROPERTY)
+_GET_SUPER: Final = int(OpCode.GET_SUPER)
+_EQUAL: Final = int(OpCode.EQUAL)
+_GREATER: Final = int(OpCode.GREATER)
+_GREATER_EQUAL: Final = int(OpCode.GREATER_EQUAL)
+_LESS: Final = int(OpCode.LESS)
+_LESS_EQUAL: Final = int(OpCode.LESS_EQUAL)
+_ADD: Final = int(OpCode.ADD)
+_SUBTRACT: Final = int(OpCode.SUBTRACT)
+_MULTIPLY: Final = int(OpCode.MULTIPLY)
+_DIVIDE: Final = int(OpCode.DIVIDE)
+_NOT: Final = int(OpCode.NOT)
+_NEGATE: Final = int(OpCode.NEGATE)
+_PRINT: Final = int(OpCode.PRINT)
+_JUMP: Final = int(OpCode.JUMP)
+_JUMP_IF_FALSE: Final = int(OpCode.JUMP_IF_FALSE)
+_LOOP: Final = int(OpCode.LOOP)
+_CALL: Final = int(OpCode.CALL)
+_INVOKE: Final = int(OpCode.INVOKE)
+_SUPER_INVOKE: Final = int(OpCode.SUPER_INVOKE)
+_CLOSURE: Final = int(OpCode.CLOSURE)
+_CLOSE_UPVALUE: Final = int(OpCode.CLOSE_UPVALUE)
+_RETURN: Final = int(OpCode.RETURN)
+_CLASS: Final = int(OpCode.CLASS)
+_INHERIT: Final = int(OpCode.INHERIT)
+_METHOD: Final = int(OpCode.METHOD)
+_TAIL_CALL: Final = int(OpCode.TAIL_CALL)
+_TAIL_INVOKE: Final = int(OpCode.TAIL_INVOKE)
+_TAIL_SUPER_INVOKE: Final = int(OpCode.TAIL_SUPER_INVOKE)
+
+
+class CallFrame:
+    def __init__(self, closure: ObjClosure, slots: int):
+        self.closure: Final = closure
+        self.ip = 0
+        self.slots: Final = slots
+
+
+class VM:
+    def __init__(self, max_frames: int = FRAMES_MAX, intern_strings: bool = False):
+        self.max_frames = max_frames
+        self.intern_strings: Final = intern_strings
+        self.frames: Final[list[CallFrame]] = []
+        self.stack: Final[list[Any]] = []
+        self.globals: Final[dict[str, Any]] = {}
+        self.open_upvalues: Optional[ObjUpvalue] = None
+        self._tail_calls = 0
+
+        self.globals.update(NATIVES)
+
+    def stats(self) -> dict[str, int]:
+        return {"tail calls": self._tail_calls}
+
+    def interpret(self, statements: list[Stmt]) -> None:
+        function: Optional[ObjFunction] = Compiler().compile(statements)
+        if function is None:
+            return
+
+        closure = ObjClosure(function)
+        self.stack.append(closure)
+
+        try:
+            self._call(closure, 0)
+            self._run()
+        except LoxRuntimeError as e:
+            LoxErrors.runtime_error(e)
+            self._reset_stack()
+
+    def _reset_stack(self) -> None:
+        self.stack.clear()
+        self.frames.clear()
+        self.open_upvalues = None
+
+    def _runtime_error(self, message: str) -> LoxRuntimeError:
+        frame: CallFrame = self.frames[-1]
+        line: int = frame.closure.function.chunk.lines[frame.ip - 1]
+        return LoxRuntimeError(Token(TokenType.EOF, "", None, line), message)
+
+    def _call(self, closure: ObjClosure, arg_count: int) -> None:
+        if arg_count != closure.function.arity:
+            raise self._runtime_error(f"Expected {closure.function.arity} arguments but got {arg_count}.")
+
+        if len(self.frames) == self.max_frames:
+            raise self._runtime_error("Stack overflow.")
+
+        self.frames.append(CallFrame(closure, len(self.stack) - arg_count - 1))
+
+    def _call_value(self, callee: Any, arg_count: int) -> None:
+        stack: list[Any] = self.stack
+
+        if type(callee) is ObjClosure:
+            self._call(callee, arg_count)
+        elif type(callee) is ObjBoundMethod:
+            stack[-arg_count - 1] = callee.receiver
+            self._call(callee.method, arg_count)
+        elif type(callee) is ObjClass:
+            stack[-arg_count - 1] = ObjInstance(callee)
+            initializer: Optional[ObjClosure] = callee.methods.get("init")
+            if initializer is not None:
+                self._call(initializer, arg_count)
+            elif arg_count != 0:
+                raise self._runtime_error(f"Expected 0 arguments but got {arg_count}.")
+        elif type(callee) is LoxNative:
+            if not callee.min_arity <= arg_count <= callee.max_arity:
+                raise self._runtime_error(callee.arity_error(arg_count))
+
+            arguments: list[Any] = stack[len(stack) - arg_count:]
+            try:
+                result: Any = callee.function(arguments) if callee.batch else callee.function(*arguments)
+            except NativeError as e:
+                raise self._runtime_error(str(e)) from None
+            del stack[len(stack) - arg_count - 1:]
+            stack.append(result)
+        else:
+            raise self._runtime_error("Can only call functions and classes.")
+
+    def _invoke_from_class(self, klass: ObjClass, name: str, arg_count: int) -> None:
+        method: Optional[ObjClosure] = klass.methods.get(name)
+        if method is None:
+            raise self._runtime_error(f"Undefined property '{name}'.")
+
+        self._call(method, arg_count)
+
+    def _invoke(self, name: str, arg_count: int) -> None:
+        receiver: Any = self.stack[-arg_count - 1]
+
+        if type(receiver) is not ObjInstance:
+            raise self._runtime_error("Only instances have properties.")
+
+        value: Any = receiver.fields.get(name, _MISSING)
+        if value is not _MISSING:
+            self.stack[-arg_count - 1] = value
+            self._call_value(value, arg_count)
+            return
+
+        self._invoke_from_class(receiver.klass, name, arg_count)
+
+    def _tail_invoke(self, name: str, arg_count: int) -> None:
+        receiver: Any = self.stack[-arg_count - 1]
+
+        if type(receiver) is not ObjInstance:
+            raise self._runtime_error("Only instances have properties.")
+
+        value: Any = receiver.fields.get(name, _MISSING)
+        if value is not _MISSING:
+            self.stack[-arg_count - 1] = value
+            self._tail_call_value(value, arg_count)
+            return
+
+        self._tail_invoke_from_class(receiver.klass, name, arg_count)
+
+    def _tail_invoke_from_class(self, klass: ObjClass, name: str, arg_count: int) -> None:
+        method: Optional[ObjClosure] = klass.methods.get(name)
+        if method is None:
+            raise self._runtime_error(f"Undefined property '{name}'.")
+
+        self._tail_call_value(method, arg_count)
+
+    def _tail_call_value(self, callee: Any, arg_count: int) -> None:
+        # the out-of-line TAIL_CALL, for TAIL_INVOKE and TAIL_SUPER_INVOKE
+        stack: list[Any] = self.stack
+        if type(callee) is ObjBoundMethod:
+            stack[-arg_count - 1] = callee.receiver
+            callee = callee.method
+
+        if type(callee) is ObjClosure and callee.function.arity == arg_count:
+            slots: int = self.frames[-1].slots
+            self._close_upvalues(slots)
+            stack[slots:] = stack[-arg_count - 1:]
+            self.frames[-1] = CallFrame(callee, slots)
+            self._tail_calls += 1
+        else:
+            self._call_value(callee, arg_count)
+
+    def _bind_method(self, klass: ObjClass, name: str) -> None:
+        method: Optional[ObjClosure] = klass.methods.get(name)
+        if method is None:
+            raise self._runtime_error(f"Undefined property '{name}'.")
+
+        self.stack[-1] = ObjBoundMethod(self.stack[-1], method)
+
+    def _capture_upvalue(self, local: int) -> ObjUpvalue:
+        prev_upvalue: Optional[ObjUpvalue] = None
+        upvalue: Optional[ObjUpvalue] = self.open_upvalues
+        while upvalue is not None and upvalue.location > local:
+            prev_upvalue = upvalue
+            upvalue = upvalue.next
+
+        if upvalue is not None and upvalue.location == local:
+            return upvalue
+
+        created_upvalue = ObjUpvalue(self.stack, local, upvalue)
+
+        if prev_upvalue is None:
+            self.open_upvalues = created_upvalue
+        else:
+            prev_upvalue.next = created_upvalue
+
+        return created_upvalue
+
+    def _close_upvalues(self, last: int) -> None:
+        while self.open_upvalues is not None and self.open_upvalues.location >= last:
+            upvalue: ObjUpvalue = self.open_upvalues
+            upvalue.close()
+            self.open_upvalues = upvalue.next
+
+    def _run(self) -> None:
+        stack: list[Any] = self.stack
+        frames: list[CallFrame] = self.frames
+        globals_: dict[str, Any] = self.globals
+        max_frames: int = self.max_frames
+        concat_strings = concat_interned if self.intern_strings else concat
+        push = stack.append
+        pop = stack.pop
+
+        frame: CallFrame = frames[-1]
+        code: bytearray = frame.closure.function.chunk.code
+        constants: list[Any] = frame.closure.function.chunk.constants
+        upvalues: list[ObjUpvalue] = frame.closure.upvalues
+        slots: int = frame.slots
+        ip: int = frame.ip
+
+        while True:
+            instruction: int = code[ip]
+            ip += 1
+
+            # the most frequently executed instructions are tested first
+            if instruction == _GET_LOCAL:
+                push(stack[slots + code[ip]])
+                ip += 1
+            elif instruction == _CONSTANT:
+                push(constants[code[ip]])
+                ip += 1
+            elif instruction == _POP:
+                pop()
+            elif instruction == _GET_GLOBAL:
+                name: str = constants[code[ip]]
+                ip += 1
+                try:
+                    push(globals_[name])
+                except KeyError:
+                    frame.ip = ip
+                    raise self._runtime_error(f"Undefined variable '{name}'.") from None
+            elif instruction == _JUMP_IF_FALSE:
+                value: Any = stack[-1]
+                if value is None or value is False:
+                    ip += (code[ip] << 8) | code[ip + 1]
+                ip += 2
+            elif instruction == _GET_PROPERTY:
+                instance: Any = stack[-1]
+                name: str = constants[code[ip]]
+                ip += 1
+                if type(instance) is not ObjInstance:
+                    frame.ip = ip
+                    raise self._runtime_error("Only instances have properties.")
+
+                value: Any = instance.fields.get(name, _MISSING)
+                if value is not _MISSING:
+                    stack[-1] = value
+                else:
+                    frame.ip = ip
+                    self._bind_method(instance.klass, name)
+            elif instruction == _INVOKE:
+                name: str = constants[code[ip]]
+                arg_count: int = code[ip + 1]
+                ip += 2
+                frame.ip = ip
+
+                receiver: Any = stack[-arg_count - 1]
+                method: Optional[ObjClosure] = None
+                if type(receiver) is ObjInstance and name not in receiver.fields:
+                    method = receiver.klass.methods.get(name)
+
+                # calling a method found on the class with the right arity is handled inline,
+                # everything else (fields holding callables, errors) goes through _invoke
+                if method is not None and method.function.arity == arg_count and len(frames) < max_frames:
+                    frame = CallFrame(method, len(stack) - arg_count - 1)
+                    frames.append(frame)
+                else:
+                    self._invoke(name, arg_count)
+                    frame = frames[-1]
+
+                code = frame.closure.function.chunk.code
+                constants = frame.closure.function.chunk.constants
+                upvalues = frame.closure.upvalues
+                slots = frame.slots
+                ip = frame.ip
+            elif instruction == _CALL:
+                arg_count: int = code[ip]
+                ip += 1
+                frame.ip = ip
+
+                callee: Any = stack[-arg_count - 1]
+                if type(callee) is ObjClosure and callee.function.arity == arg_count and len(frames) < max_frames:
+                    frame = CallFrame(callee, len(stack) - arg_count - 1)
+                    frames.append(frame)
+                else:
+                    self._call_value(callee, arg_count)
+                    frame = frames[-1]
+
+                code = frame.closure.function.chunk.code
+                constants = frame.closure.function.chunk.constants
+                upvalues = frame.closure.upvalues
+                slots = frame.slots
+                ip = frame.ip
+            elif instruction == _TAIL_CALL:
+                arg_count: int = code[ip]
+                ip += 1
+                frame.ip = ip
+
+                callee: Any = stack[-arg_count - 1]
+                if type(callee) is ObjBoundMethod:
+                    stack[-arg_count - 1] = callee.receiver
+                    callee = callee.method
+
+                # a closure called in tail position replaces the caller's frame, so a chain of tail
+                # calls runs in constant stack; anything else is called normally and then returned
+                if type(callee) is ObjClosure and callee.function.arity == arg_count:
+                    self._close_upvalues(slots)
+                    stack[slots:] = stack[-arg_count - 1:]
+                    frame = CallFrame(callee, slots)
+                    frames[-1] = frame
+                    self._tail_calls += 1
+                else:
+                    self._call_value(callee, arg_count)
+                    frame = frames[-1]
+
+                code = frame.closure.function.chunk.code
+                constants = frame.closure.function.chunk.constants
+                upvalues = frame.closure.upvalues
+                slots = frame.slots
+                ip = frame.ip
+            elif instruction == _TAIL_INVOKE:
+                name: str = constants[code[ip]]
+                arg_count: int = code[ip + 1]
+                frame.ip = ip + 2
+                self._tail_invoke(name, arg_count)
+
+                frame = frames[-1]
+                code = frame.closure.function.chunk.code
+                constants = frame.closure.function.chunk.constants
+                upvalues = frame.closure.upvalues
+                slots = frame.slots
+                ip = frame.ip
+            elif instruction == _TAIL_SUPER_INVOKE:
+                name: str = constants[code[ip]]
+                arg_count: int = code[ip + 1]
+                frame.ip = ip + 2
+                self._tail_invoke_from_class(pop(), name, arg_count)
+
+                frame = frames[-1]
+                code = frame.closure.function.chunk.code
+                constants = frame.closure.function.chunk.constants
+                upvalues = frame.closure.upvalues
+                slots = frame.slots
+                ip = frame.ip
+            elif instruction == _RETURN:
+                result: Any = pop()
+                self._close_upvalues(slots)
+                frames.pop()
+                if len(frames) == 0:
+                    pop()
+                    return
+
+                del stack[slots:]
+                push(result)
+
+                frame = frames[-1]
+                code = frame.closure.function.chunk.code
+                constants = frame.closure.function.chunk.constants
+                upvalues = frame.closure.upvalues
+                slots = frame.slots
+                ip = frame.ip
+            elif instruction == _ADD:
+                b: Any = pop()
+                a: Any = stack[-1]
+                if type(a) is float and type(b) is float:
+                    stack[-1] = a + b
+                elif (type(a) is str or type(a) is Rope) and (type(b) is str or type(b) is Rope):
+                    stack[-1] = concat_strings(a, b)
+                else:
+                    frame.ip = ip
+                    raise self._runtime_error("Operands must be two numbers or two strings.")
+            elif instruction == _SUBTRACT:
+                b: Any = pop()
+                a: Any = stack[-1]
+                if type(a) is not float or type(b) is not float:
+                    frame.ip = ip
+                    raise self._runtime_error("Operands must be numbers.")
+                stack[-1] = a - b
+            elif instruction == _LESS:
+                b: Any = pop()
+                a: Any = stack[-1]
+                if type(a) is not float or type(b) is not float:
+                    frame.ip = ip
+                    raise self._runtime_error("Operands must be numbers.")
+                stack[-1] = a < b
+            elif instruction == _LESS_EQUAL:
+                b: Any = pop()
+                a: Any = stack[-1]
+                if type(a) is not float or type(b) is not float:
+                    frame.ip = ip
+                    raise self._runtime_error("Operands must be numbers.")
+                stack[-1] = a <= b
+            elif instruction == _SET_LOCAL:
+                stack[slots + code[ip]] = stack[-1]
+                ip += 1
+            elif instruction == _SET_PROPERTY:
+                instance: Any = stack[-2]
+                if type(instance) is not ObjInstance:
+                    frame.ip = ip + 1
+                    raise self._runtime_error("Only instances have fields.")
+
+                value: Any = pop()
+                instance.fields[constants[code[ip]]] = value
+                ip += 1
+                stack[-1] = value
+            elif instruction == _LOOP:
+                ip -= ((code[ip] << 8) | code[ip + 1]) - 2
+            elif instruction == _JUMP:
+                ip += ((code[ip] << 8) | code[ip + 1]) + 2
+            elif instruction == _GET_UPVALUE:
+                upvalue: ObjUpvalue = upvalues[code[ip]]
+                push(upvalue.cells[upvalue.location])
+                ip += 1
+            elif instruction == _SET_UPVALUE:
+                upvalue: ObjUpvalue = upvalues[code[ip]]
+                upvalue.cells[upvalue.location] = stack[-1]
+                ip += 1
+            elif instruction == _NIL:
+                push(None)
+            elif instruction == _TRUE:
+                push(True)
+            elif instruction == _FALSE:
+                push(False)
+            elif instruction == _SET_GLOBAL:
+                name: str = constants[code[ip]]
+                ip += 1
+                if name not in globals_:
+                    frame.ip = ip
+                    raise self._runtime_error(f"Undefined variable '{name}'.")
+                globals_[name] = stack[-1]
+            elif instruction == _DEFINE_GLOBAL:
+                globals_[constants[code[ip]]] = pop()
+                ip += 1
+            elif instruction == _EQUAL:
+                b: Any = pop()
+                stack[-1] = values_equal(stack[-1], b)
+            elif instruction == _GREATER:
+                b: Any = pop()
+                a: Any = stack[-1]
+                if type(a) is not float or type(b) is not float:
+                    frame.ip = ip
+                    raise self._runtime_error("Operands must be numbers.")
+                stack[-1] = a > b
+            elif instruction == _GREATER_EQUAL:
+                b: Any = pop()
+                a: Any = stack[-1]
+                if type(a) is not float or type(b) is not float:
+                    frame.ip = ip
+                    raise self._runtime_error("Operands must be numbers.")
+                stack[-1] = a >= b
+            elif instruction == _MULTIPLY:
+                b: Any = pop()
+                a: Any = stack[-1]
+                if type(a) is not float or type(b) is not float:
+                    frame.ip = ip
+                    raise self._runtime_error("Operands must be numbers.")
+                stack[-1] = a * b
+            elif instruction == _DIVIDE:
+                b: Any = pop()
+                a: Any = stack[-1]
+                if type(a) is not float or type(b) is not float:
+                    frame.ip = ip
+                    raise self._runtime_error("Operands must be numbers.")
+                stack[-1] = a / b if b else divide(a, b)
+            elif instruction == _NOT:
+                value: Any = stack[-1]
+                stack[-1] = value is None or value is False
+            elif instruction == _NEGATE:
+                value: Any = stack[-1]
+                if type(value) is not float:
+                    frame.ip = ip
+                    raise self._runtime_error("Operand must be a number.")
+                stack[-1] = -value
+            elif instruction == _PRINT:
+                print(stringify(pop()))
+            elif instruction == _SUPER_INVOKE:
+                name: str = constants[code[ip]]
+                arg_count: int = code[ip + 1]
+                frame.ip = ip + 2
+                self._invoke_from_class(pop(), name, arg_count)
+
+                frame = frames[-1]
+                code = frame.closure.function.chunk.code
+                constants = frame.closure.function.chunk.constants
+                upvalues = frame.closure.upvalues
+                slots = frame.slots
+                ip = frame.ip
+            elif instruction == _GET_SUPER:
+                name: str = constants[code[ip]]
+                ip += 1
+                frame.ip = ip
+                superclass: ObjClass = pop()
+                self._bind_method(superclass, name)
+            elif instruction == _CLOSURE:
+                function: ObjFunction = constants[code[ip]]
+                ip += 1
+                closure = ObjClosure(function)
+                push(closure)
+                for _ in range(function.upvalue_count):
+                    is_local: int = code[ip]
+                    index: int = code[ip + 1]
+                    ip += 2
+                    if is_local:
+                        closure.upvalues.append(self._capture_upvalue(slots + index))
+                    else:
+                        closure.upvalues.append(upvalues[index])
+            elif instruction == _CLOSE_UPVALUE:
+                self._close_upvalues(len(stack) - 1)
+                pop()
+            elif instruction == _CLASS:
+                push(ObjClass(constants[code[ip]]))
+                ip += 1
+            elif instruction == _INHERIT:
+                superclass: Any = stack[-2]
+                if type(superclass) is not ObjClass:
+                    frame.ip = ip
+                    raise self._runtime_error("Superclass must be a class.")
+
+                subclass: ObjClass = pop()
+                subclass.methods.update(superclass.methods)
+            elif instruction == _METHOD:
+                method: ObjClosure = pop()
+                stack[-1].methods[constants[code[ip]]] = method
+                ip += 1
+